@@ -12,35 +12,122 @@ develop a new k8s charm using the Operator Framework:
 https://juju.is/docs/sdk/create-a-minimal-kubernetes-charm
 """
 
+import importlib.util
 import logging
-import socket
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
+from types import ModuleType
+from typing import TYPE_CHECKING, cast
 
 import ops
 
 import environment as env
-import importer_node as node
-import launchpad as lp
-import package_installation as pkgs
-import user_management as usr
+from launchpad import is_valid_lp_username
+
+
+def _lazy_import(name: str) -> ModuleType:
+    """Import a module that is only loaded on first attribute access.
+
+    Args:
+        name: The name of the module to import.
+
+    Returns:
+        The module, which may not be loaded yet.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# These modules pull in the apt, snap, passwd, systemd and pathops libraries, which hooks
+# such as update-status never use.
+if TYPE_CHECKING:
+    import importer_node as node
+    import package_installation as pkgs
+    import user_management as usr
+else:
+    node = _lazy_import("importer_node")
+    pkgs = _lazy_import("package_installation")
+    usr = _lazy_import("user_management")
 
 # Log messages can be retrieved using juju debug-log
 logger = logging.getLogger(__name__)
 
-VALID_LOG_LEVELS = ["info", "debug", "warning", "error", "critical"]
+VALID_LOG_LEVELS = frozenset({"info", "debug", "warning", "error", "critical"})
+VALID_SNAP_CHANNELS = frozenset({"beta", "edge", "stable"})
 
 # Constant configuration values
 GIT_UBUNTU_SYSTEM_USER_USERNAME = "git-ubuntu"
 GIT_UBUNTU_GIT_USER_NAME = "Ubuntu Git Importer"
 GIT_UBUNTU_GIT_EMAIL = "usd-importer-do-not-mail@canonical.com"
 GIT_UBUNTU_USER_HOME_DIR = "/var/local/git-ubuntu"
+GIT_UBUNTU_LP_CREDENTIALS_FILE = f"{GIT_UBUNTU_USER_HOME_DIR}/.config/lp-credentials.oauth"
 GIT_UBUNTU_SOURCE_URL = "https://git.launchpad.net/git-ubuntu"
-GIT_UBUNTU_KEYRING_FOLDER = Path(__file__).parent.parent / "keyring"
+GIT_UBUNTU_APT_PACKAGES = ["git", "sqlite3", "socat"]
+GIT_UBUNTU_KEYRING_FOLDER = Path(__file__).resolve().parent.parent / "keyring"
+
+
+@dataclass(frozen=True, slots=True)
+class _CharmConfig:
+    """Typed snapshot of the charm config, taken once per hook.
+
+    Attributes:
+        controller_port: The network port on the primary node used for import assignments.
+        channel: The channel for the git-ubuntu snap.
+        lpuser: The Launchpad user used to push updates.
+        lpuser_secret_id: The ID of the secret holding the Launchpad user's keys, if set.
+        publish: True if updates should be pushed to Launchpad.
+        workers: The number of worker processes per secondary node.
+    """
+
+    controller_port: int
+    channel: str
+    lpuser: str
+    lpuser_secret_id: str | None
+    publish: bool
+    workers: int
+
+    @classmethod
+    def from_config(cls, config: ops.ConfigData) -> "_CharmConfig":
+        """Build a config snapshot, coercing each option to its expected type.
+
+        Args:
+            config: The charm config to read from.
+
+        Returns:
+            The typed config snapshot.
+        """
+        secret_id = config.get("lpuser_secret_id")
+
+        return cls(
+            controller_port=int(config.get("controller_port") or 0),
+            channel=str(config.get("channel")),
+            lpuser=str(config.get("lpuser")),
+            lpuser_secret_id=str(secret_id) if secret_id is not None else None,
+            publish=bool(config.get("publish")),
+            workers=int(config.get("workers") or 0),
+        )
 
 
 class GitUbuntuCharm(ops.CharmBase):
     """Charm git-ubuntu for package importing."""
 
+    _stored = ops.StoredState()
+
     def __init__(self, framework: ops.Framework):
         """Construct charm.
 
@@ -48,6 +135,9 @@ class GitUbuntuCharm(ops.CharmBase):
             framework: charm framework managed by parent class.
         """
         super().__init__(framework)
+        self._stored.set_default(applied_config={})
+        self._progress_shown = False
+
         self.framework.observe(self.on.start, self._on_start)
         self.framework.observe(self.on.install, self._on_install)
         self.framework.observe(self.on.config_changed, self._on_config_changed)
@@ -57,96 +147,95 @@ class GitUbuntuCharm(ops.CharmBase):
             self.on.replicas_relation_changed, self._on_replicas_relation_changed
         )
 
-    @property
+    @cached_property
     def _peer_relation(self) -> ops.Relation | None:
-        """Get replica peer relation if available."""
+        """Get the replica peer relation holding the primary node address, if available."""
         return self.model.get_relation("replicas")
 
-    @property
-    def _controller_port(self) -> int:
-        port = self.config.get("controller_port")
-        if isinstance(port, int):
-            return port
-        return 0
-
-    @property
-    def _git_ubuntu_snap_channel(self) -> str:
-        return str(self.config.get("channel"))
-
-    @property
-    def _lp_username(self) -> str:
-        return str(self.config.get("lpuser"))
+    @cached_property
+    def _cfg(self) -> _CharmConfig:
+        """Get the config snapshot for this hook invocation."""
+        return _CharmConfig.from_config(self.config)
 
-    @property
+    @cached_property
     def _node_id(self) -> int:
         return int(self.unit.name.split("/")[-1])
 
-    @property
+    @cached_property
     def _is_primary(self) -> bool:
         return self.unit.is_leader()
 
-    @property
-    def _is_publishing_active(self) -> bool:
-        if self.config.get("publish"):
-            return True
-        return False
+    @cached_property
+    def _http_proxy(self) -> str:
+        return env.get_juju_http_proxy_url()
 
-    @property
-    def _num_workers(self) -> int:
-        num_workers = self.config.get("workers")
-        if isinstance(num_workers, int):
-            return num_workers
-        return 0
+    @cached_property
+    def _https_proxy(self) -> str:
+        return env.get_juju_https_proxy_url()
 
-    @property
-    def _lpuser_secret(self) -> ops.model.Secret | None:
-        secret_id: str = ""
+    @cached_property
+    def _lpuser_secret_content(self) -> dict[str, str]:
+        secret_id = self._cfg.lpuser_secret_id
 
-        try:
-            secret_id = str(self.config["lpuser_secret_id"])
-        except KeyError:
+        if secret_id is None:
             logger.warning("lpuser_secret_id config not available, unable to extract keys.")
-            return None
+            return {}
 
         try:
-            return self.model.get_secret(id=secret_id)
+            return self.model.get_secret(id=secret_id).get_content(refresh=True)
         except (ops.SecretNotFoundError, ops.model.ModelError):
             logger.warning("Failed to get lpuser secret with id %s", secret_id)
 
-        return None
+        return {}
 
     @property
     def _lpuser_ssh_key(self) -> str | None:
-        secret = self._lpuser_secret
+        content = self._lpuser_secret_content
 
-        if secret is not None:
-            try:
-                return secret.get_content(refresh=True)["sshkey"]
-            except KeyError:
-                logger.warning("sshkey secret key not found in lpuser secret.")
+        if content and "sshkey" not in content:
+            logger.warning("sshkey secret key not found in lpuser secret.")
 
-        return None
+        return content.get("sshkey")
 
     @property
     def _lpuser_lp_key(self) -> str | None:
-        secret = self._lpuser_secret
+        content = self._lpuser_secret_content
 
-        if secret is not None:
-            try:
-                return secret.get_content(refresh=True)["lpkey"]
-            except KeyError:
-                logger.warning("lpkey secret key not found in lpuser secret.")
+        if content and "lpkey" not in content:
+            logger.warning("lpkey secret key not found in lpuser secret.")
 
-        return None
+        return content.get("lpkey")
 
-    @property
-    def _git_ubuntu_primary_relation(self) -> ops.Relation | None:
-        """Get the peer relation that contains the primary node IP.
+    def _set_progress(self, message: str) -> None:
+        """Report progress of a hook step, writing a maintenance status only for the first step.
+
+        Every status write runs the status-set hook tool, so later steps are only logged and
+        the unit keeps the first maintenance status until the hook sets a final status.
+
+        Args:
+            message: The progress message.
+        """
+        logger.info(message)
+
+        if not self._progress_shown:
+            self.unit.status = ops.MaintenanceStatus(message)
+            self._progress_shown = True
+
+    @cached_property
+    def _bind_address(self) -> str | None:
+        """Get this unit's address on the peer relation binding from Juju.
 
         Returns:
-            The peer relation or None if it does not exist.
+            The bind address as a string or None if it is unavailable.
         """
-        return self.model.get_relation("replicas")
+        try:
+            binding = self.model.get_binding("replicas")
+            if binding is not None and binding.network.bind_address is not None:
+                return str(binding.network.bind_address)
+        except ops.ModelError as e:
+            logger.warning("Failed to get replicas binding address: %s", str(e))
+
+        return None
 
     def _open_controller_port(self) -> bool:
         """Open the configured controller network port.
@@ -154,21 +243,20 @@ class GitUbuntuCharm(ops.CharmBase):
         Returns:
             True if the port was opened, False otherwise.
         """
-        self.unit.status = ops.MaintenanceStatus("Opening controller port.")
+        port = self._cfg.controller_port
+        if self._is_config_applied("controller_port", port):
+            return True
 
-        try:
-            port = self._controller_port
+        self._set_progress("Opening controller port.")
 
-            if port > 0:
-                self.unit.set_ports(port)
-                logger.info("Opened controller port %d", port)
-            else:
-                self.unit.status = ops.BlockedStatus("Invalid controller port configuration.")
-                return False
+        try:
+            self.unit.set_ports(port)
+            logger.info("Opened controller port %d", port)
         except ops.ModelError:
             self.unit.status = ops.BlockedStatus("Failed to open controller port.")
             return False
 
+        self._set_config_applied("controller_port", port)
         return True
 
     def _set_peer_primary_node_address(self) -> bool:
@@ -177,12 +265,12 @@ class GitUbuntuCharm(ops.CharmBase):
         Returns:
             True if the data was updated, False otherwise.
         """
-        self.unit.status = ops.MaintenanceStatus("Setting primary node address in peer relation.")
+        self._set_progress("Setting primary node address in peer relation.")
 
-        relation = self._git_ubuntu_primary_relation
+        relation = self._peer_relation
+        new_primary_address = self._bind_address
 
-        if relation:
-            new_primary_address = socket.gethostbyname(socket.gethostname())
+        if relation and new_primary_address is not None:
             relation.data[self.app]["primary_address"] = new_primary_address
             logger.info("Updated primary node address to %s", new_primary_address)
             return True
@@ -198,14 +286,14 @@ class GitUbuntuCharm(ops.CharmBase):
         if self._is_primary:
             return "127.0.0.1"
 
-        relation = self._git_ubuntu_primary_relation
+        relation = self._peer_relation
 
         if relation:
-            primary_address = relation.data[self.app]["primary_address"]
+            primary_address = relation.data[self.app].get("primary_address")
 
-            if primary_address is not None and len(str(primary_address)) > 0:
+            if primary_address:
                 logger.info("Found primary node address %s", primary_address)
-                return str(primary_address)
+                return primary_address
 
         logger.warning("No primary node address found.")
         return None
@@ -216,12 +304,12 @@ class GitUbuntuCharm(ops.CharmBase):
         Returns:
             True if the keys were updated successfully, False otherwise.
         """
-        self.unit.status = ops.MaintenanceStatus("Refreshing secret keys.")
+        self._set_progress("Refreshing secret keys.")
 
         ssh_key_data = self._lpuser_ssh_key
         lp_key_data = self._lpuser_lp_key
 
-        if self._is_publishing_active:
+        if self._cfg.publish:
             if ssh_key_data is None:
                 logger.warning("ssh private key unavailable, Launchpad publishing will fail.")
             elif not usr.update_ssh_private_key(
@@ -250,20 +338,18 @@ class GitUbuntuCharm(ops.CharmBase):
         Returns:
             True if the source was refreshed successfully, False otherwise.
         """
-        self.unit.status = ops.MaintenanceStatus("Refreshing git-ubuntu source.")
+        self._set_progress("Refreshing git-ubuntu source.")
 
         # Set https proxy environment variable if available.
-        https_proxy = env.get_juju_https_proxy_url()
-
-        if https_proxy != "":
-            logger.info("Using https proxy %s for git-ubuntu source refresh.", https_proxy)
+        if self._https_proxy != "":
+            logger.info("Using https proxy %s for git-ubuntu source refresh.", self._https_proxy)
 
         # Run clone or pull of git-ubuntu source.
         if not usr.refresh_git_ubuntu_source(
             GIT_UBUNTU_SYSTEM_USER_USERNAME,
             GIT_UBUNTU_USER_HOME_DIR,
             GIT_UBUNTU_SOURCE_URL,
-            https_proxy,
+            self._https_proxy,
         ):
             self.unit.status = ops.BlockedStatus("Failed to refresh git-ubuntu source.")
             return False
@@ -276,12 +362,12 @@ class GitUbuntuCharm(ops.CharmBase):
         Returns:
             True if the config was updated successfully, False otherwise.
         """
-        self.unit.status = ops.MaintenanceStatus("Refreshing SSH config.")
+        self._set_progress("Refreshing SSH config.")
 
         if not usr.update_ssh_config(
             GIT_UBUNTU_SYSTEM_USER_USERNAME,
             GIT_UBUNTU_USER_HOME_DIR,
-            env.get_juju_http_proxy_url(),
+            self._http_proxy,
         ):
             self.unit.status = ops.BlockedStatus(
                 "Failed to update SSH config for git-ubuntu user."
@@ -290,54 +376,87 @@ class GitUbuntuCharm(ops.CharmBase):
 
         return True
 
-    def _refresh_importer_node(self) -> None:
-        """Remove old and install new git-ubuntu services."""
-        self.unit.status = ops.MaintenanceStatus("Refreshing git-ubuntu services.")
+    def _refresh_importer_node(self) -> bool:
+        """Remove old and install new git-ubuntu services.
+
+        Returns:
+            True if the services are installed and up to date, False otherwise.
+        """
+        self._set_progress("Refreshing git-ubuntu services.")
+
+        primary_ip = self._get_primary_node_address()
+
+        # A secondary node cannot run without a primary, so leave existing services alone.
+        if primary_ip is None:
+            self.unit.status = ops.BlockedStatus("Secondary node requires a peer relation.")
+            return False
+
+        config_digest = node.get_config_digest(
+            self._is_primary,
+            self._node_id,
+            self._cfg.workers,
+            self._cfg.lpuser,
+            self._cfg.publish,
+            self._cfg.controller_port,
+            primary_ip,
+            self._http_proxy,
+            self._https_proxy,
+        )
+
+        if node.is_config_current(GIT_UBUNTU_USER_HOME_DIR, self._is_primary, config_digest):
+            # The services were left running, so report them as running rather than installed.
+            logger.info("git-ubuntu services are up to date, skipping refresh.")
+            self._set_running_status()
+            return True
+
+        # The poller cannot run without its denylist, so keep the old services until it exists.
+        if self._is_primary and not node.denylist_exists(GIT_UBUNTU_USER_HOME_DIR):
+            self.unit.status = ops.BlockedStatus("Package denylist not found.")
+            return False
 
         if not node.reset(GIT_UBUNTU_USER_HOME_DIR):
             self.unit.status = ops.BlockedStatus("Failed to remove old git-ubuntu services.")
-            return
+            return False
 
         if self._is_primary:
-            if not node.setup_primary_node(
+            installed = node.setup_primary_node(
                 GIT_UBUNTU_USER_HOME_DIR,
                 GIT_UBUNTU_SYSTEM_USER_USERNAME,
-                self._controller_port,
-                env.get_juju_http_proxy_url(),
-                env.get_juju_https_proxy_url(),
-            ):
-                self.unit.status = ops.BlockedStatus("Failed to install git-ubuntu services.")
-                return
-            logger.info("Initialized importer node as primary.")
+                self._cfg.controller_port,
+                self._http_proxy,
+                self._https_proxy,
+            )
         else:
-            primary_ip = self._get_primary_node_address()
-
-            if primary_ip is None:
-                self.unit.status = ops.BlockedStatus("Secondary node requires a peer relation.")
-                return
-
-            if not node.setup_secondary_node(
+            installed = node.setup_secondary_node(
                 GIT_UBUNTU_USER_HOME_DIR,
                 GIT_UBUNTU_SYSTEM_USER_USERNAME,
-                self._is_publishing_active,
-                self._controller_port,
+                self._cfg.publish,
+                self._cfg.controller_port,
                 primary_ip,
-                Path(GIT_UBUNTU_USER_HOME_DIR, ".config/lp-credentials.oauth").as_posix(),
-                env.get_juju_https_proxy_url(),
-            ):
-                self.unit.status = ops.BlockedStatus("Failed to install git-ubuntu services.")
-                return
-            logger.info("Initialized importer node as secondary.")
+                GIT_UBUNTU_LP_CREDENTIALS_FILE,
+                self._https_proxy,
+            )
 
+        if not installed:
+            self.unit.status = ops.BlockedStatus("Failed to install git-ubuntu services.")
+            return False
+
+        node_type_str = "primary" if self._is_primary else "secondary"
+        logger.info("Initialized importer node as %s.", node_type_str)
+
+        node.save_config_digest(GIT_UBUNTU_USER_HOME_DIR, config_digest)
         self.unit.status = ops.ActiveStatus("Importer node install complete.")
+        return True
+
+    def _set_running_status(self) -> None:
+        """Report the git-ubuntu services of this node as running."""
+        node_type_str = "primary" if self._is_primary else "secondary"
+        self.unit.status = ops.ActiveStatus(f"Running git-ubuntu importer {node_type_str} node.")
 
     def _start_services(self) -> None:
         """Start the services and note the result through status."""
-        if node.start(GIT_UBUNTU_USER_HOME_DIR, self._node_id, self._num_workers):
-            node_type_str = "primary" if self._is_primary else "secondary"
-            self.unit.status = ops.ActiveStatus(
-                f"Running git-ubuntu importer {node_type_str} node."
-            )
+        if node.start(GIT_UBUNTU_USER_HOME_DIR, self._node_id, self._cfg.workers):
+            self._set_running_status()
         else:
             self.unit.status = ops.BlockedStatus("Failed to start services.")
 
@@ -345,77 +464,100 @@ class GitUbuntuCharm(ops.CharmBase):
         """Handle start event."""
         self._start_services()
 
-    def _update_git_user_config(self) -> bool:
-        """Attempt to update git config with the default git-ubuntu user name and email."""
-        self.unit.status = ops.MaintenanceStatus("Updating git config for git-ubuntu user.")
+    def _validate_config(self) -> str | None:
+        """Check the config snapshot before any changes are applied.
+
+        Returns:
+            A message describing the first invalid option, or None if the config is valid.
+        """
+        if not is_valid_lp_username(self._cfg.lpuser):
+            return "lpuser does not match Launchpad User ID requirements."
+
+        if self._cfg.channel not in VALID_SNAP_CHANNELS:
+            return "Invalid channel configured."
 
-        if not usr.update_git_user_name(
-            GIT_UBUNTU_SYSTEM_USER_USERNAME, GIT_UBUNTU_GIT_USER_NAME, GIT_UBUNTU_USER_HOME_DIR
-        ) or not usr.update_git_email(
-            GIT_UBUNTU_SYSTEM_USER_USERNAME, GIT_UBUNTU_GIT_EMAIL, GIT_UBUNTU_USER_HOME_DIR
+        if not 0 < self._cfg.controller_port <= 65535:
+            return "Invalid controller port configuration."
+
+        return None
+
+    @property
+    def _applied_config(self) -> dict[str, str | int | bool]:
+        """Get the config values applied by earlier hooks, as persisted in stored state."""
+        return cast(dict[str, str | int | bool], self._stored.applied_config)
+
+    def _is_config_applied(self, key: str, value: str | int | bool) -> bool:
+        """Check if a config value was already applied successfully by an earlier hook.
+
+        Args:
+            key: The config option name.
+            value: The current value of the option.
+
+        Returns:
+            True if the same value was last applied, False otherwise.
+        """
+        return self._applied_config.get(key) == value
+
+    def _set_config_applied(self, key: str, value: str | int | bool) -> None:
+        """Record that a config value was applied successfully.
+
+        Args:
+            key: The config option name.
+            value: The value that was applied.
+        """
+        self._applied_config[key] = value
+
+    def _update_git_config(self) -> bool:
+        """Attempt to update git config with the git-ubuntu user identity and Launchpad User ID."""
+        git_config = {
+            "user.name": GIT_UBUNTU_GIT_USER_NAME,
+            "user.email": GIT_UBUNTU_GIT_EMAIL,
+            "gitubuntu.lpuser": self._cfg.lpuser,
+        }
+
+        # Compare every entry, so a charm upgrade that changes the identity is still written.
+        applied_value = repr(sorted(git_config.items()))
+        if self._is_config_applied("git_config", applied_value):
+            return True
+
+        self._set_progress("Updating git config for git-ubuntu user.")
+
+        if not usr.update_git_config(
+            GIT_UBUNTU_SYSTEM_USER_USERNAME, GIT_UBUNTU_USER_HOME_DIR, git_config
         ):
-            self.unit.status = ops.BlockedStatus("Failed to set git user config.")
+            self.unit.status = ops.BlockedStatus("Failed to update git config.")
             return False
-        return True
 
-    def _update_lpuser_config(self) -> bool:
-        """Attempt to update git config with the new Launchpad User ID."""
-        self.unit.status = ops.MaintenanceStatus("Updating lpuser entry for git-ubuntu user.")
-        lpuser = self._lp_username
-        if lp.is_valid_lp_username(lpuser):
-            if not usr.update_git_ubuntu_lpuser(
-                GIT_UBUNTU_SYSTEM_USER_USERNAME, lpuser, GIT_UBUNTU_USER_HOME_DIR
-            ):
-                self.unit.status = ops.BlockedStatus("Failed to update lpuser config.")
-                return False
-        else:
-            self.unit.status = ops.BlockedStatus(
-                "lpuser does not match Launchpad User ID requirements."
-            )
-            return False
+        self._set_config_applied("git_config", applied_value)
         return True
 
     def _update_git_ubuntu_snap(self) -> bool:
         """Install or refresh the git-ubuntu snap with the given channel version."""
-        self.unit.status = ops.MaintenanceStatus("Updating git-ubuntu snap.")
+        if self._is_config_applied("channel", self._cfg.channel):
+            return True
 
-        # Confirm the channel is valid.
-        channel = self._git_ubuntu_snap_channel
-        if channel not in ("beta", "edge", "stable"):
-            self.unit.status = ops.BlockedStatus("Invalid channel configured.")
-            return False
+        self._set_progress("Updating git-ubuntu snap.")
 
         # Install or refresh the git-ubuntu snap.
-        if not pkgs.git_ubuntu_snap_refresh(channel):
+        if not pkgs.git_ubuntu_snap_refresh(self._cfg.channel):
             self.unit.status = ops.BlockedStatus("Failed to install or refresh git-ubuntu snap.")
             return False
 
+        self._set_config_applied("channel", self._cfg.channel)
         return True
 
     def _on_install(self, _: ops.InstallEvent) -> None:
         """Handle one-time installation of packages during install hook."""
-        self.unit.status = ops.MaintenanceStatus("Installing git.")
-
-        if not pkgs.git_install():
-            self.unit.status = ops.BlockedStatus("Failed to install git.")
-            return
-
-        self.unit.status = ops.MaintenanceStatus("Installing sqlite3.")
-
-        if not pkgs.sqlite3_install():
-            self.unit.status = ops.BlockedStatus("Failed to install sqlite3.")
-            return
-
-        self.unit.status = ops.MaintenanceStatus("Installing socat.")
+        packages_str = ", ".join(GIT_UBUNTU_APT_PACKAGES)
+        self._set_progress(f"Installing {packages_str}.")
 
-        if not pkgs.socat_install():
-            self.unit.status = ops.BlockedStatus("Failed to install socat.")
+        if not pkgs.install_packages(GIT_UBUNTU_APT_PACKAGES):
+            self.unit.status = ops.BlockedStatus(f"Failed to install {packages_str}.")
             return
 
-        self.unit.status = ops.MaintenanceStatus("Setting up git-ubuntu user.")
+        self._set_progress("Setting up git-ubuntu user.")
         usr.setup_git_ubuntu_user(GIT_UBUNTU_SYSTEM_USER_USERNAME, GIT_UBUNTU_USER_HOME_DIR)
 
-        self.unit.status = ops.MaintenanceStatus("Setting up git-ubuntu user services directory.")
         if not usr.setup_git_ubuntu_user_services_dir(
             GIT_UBUNTU_SYSTEM_USER_USERNAME, GIT_UBUNTU_USER_HOME_DIR
         ):
@@ -442,23 +584,39 @@ class GitUbuntuCharm(ops.CharmBase):
         Update user settings, git config, the git-ubuntu snap and source, open ports, and keys.
         If everything is successful, refresh git-ubuntu services.
         """
-        if (
-            self._update_git_user_config()
-            and self._update_lpuser_config()
-            and self._update_git_ubuntu_snap()
-            and self._open_controller_port()
-            and self._refresh_secret_keys()
-            and self._refresh_ssh_config()
-            and self._refresh_git_ubuntu_source()
-        ):
-            # Initialize or re-install git-ubuntu services as needed.
-            self._refresh_importer_node()
+        config_error = self._validate_config()
+        if config_error is not None:
+            self.unit.status = ops.BlockedStatus(config_error)
+            return
+
+        self._set_progress("Applying git-ubuntu configuration.")
+
+        stages: list[tuple[str, Callable[[], bool]]] = [
+            ("git config", self._update_git_config),
+            ("git-ubuntu snap", self._update_git_ubuntu_snap),
+            ("controller port", self._open_controller_port),
+            ("secret keys", self._refresh_secret_keys),
+            ("ssh config", self._refresh_ssh_config),
+            ("git-ubuntu source", self._refresh_git_ubuntu_source),
+            ("git-ubuntu services", self._refresh_importer_node),
+        ]
+
+        # Each stage sets its own blocked status on failure, so stop at the first one.
+        for stage_name, stage in stages:
+            start_time = time.monotonic()
+            stage_success = stage()
+            logger.debug(
+                "Config stage %s took %.2f seconds.", stage_name, time.monotonic() - start_time
+            )
+
+            if not stage_success:
+                return
 
     def _on_leader_elected(self, _: ops.LeaderElectedEvent) -> None:
         """Refresh services and update peer data when the unit is elected as leader."""
         if self._set_peer_primary_node_address():
-            self._refresh_importer_node()
-            self._start_services()
+            if self._refresh_importer_node():
+                self._start_services()
         else:
             self.unit.status = ops.BlockedStatus(
                 "Failed to update primary node IP in peer relation."
@@ -466,8 +624,7 @@ class GitUbuntuCharm(ops.CharmBase):
 
     def _on_replicas_relation_changed(self, _: ops.RelationChangedEvent) -> None:
         """Refresh services for secondary nodes when peer relations change."""
-        if not self._is_primary:
-            self._refresh_importer_node()
+        if not self._is_primary and self._refresh_importer_node():
             self._start_services()
 
 
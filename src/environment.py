@@ -13,13 +13,7 @@ def get_juju_http_proxy_url() -> str:
     Returns:
         The proxy URL or an empty string if it does not exist.
     """
-    env = os.environ.copy()
-    http_proxy = env.get("JUJU_CHARM_HTTP_PROXY")
-
-    if http_proxy:
-        return http_proxy
-
-    return ""
+    return os.environ.get("JUJU_CHARM_HTTP_PROXY") or ""
 
 
 def get_juju_https_proxy_url() -> str:
@@ -28,10 +22,4 @@ def get_juju_https_proxy_url() -> str:
     Returns:
         The proxy URL or an empty string if it does not exist.
     """
-    env = os.environ.copy()
-    https_proxy = env.get("JUJU_CHARM_HTTPS_PROXY")
-
-    if https_proxy:
-        return https_proxy
-
-    return ""
+    return os.environ.get("JUJU_CHARM_HTTPS_PROXY") or ""
@@ -5,18 +5,30 @@
 """Git Ubuntu service runner and configurator."""
 
 import logging
+import os
+import time
 
 from charmlibs import pathops
 
 from service_management import (
+    SYSTEMD_SYSTEM_DIR,
     create_systemd_service_file,
-    start_service,
-    stop_service,
+    start_service_units,
+    stop_service_units,
     wait_for_service_active,
 )
 
 logger = logging.getLogger(__name__)
 
+# Sections and keys present in every generated service file.
+_SERVICE_HEADER_TEMPLATE = (
+    "[Unit]\nDescription={}\n\n[Service]\nUser={}\nGroup={}\nType={}\nExecStart={}"
+)
+_PRIVATE_TMP_VALUES = {None: None, True: "yes", False: "no"}
+
+# Time allowed for all started services to become active.
+SERVICE_STARTUP_TIMEOUT_SEC = 30
+
 
 def _get_services_list(service_folder: str) -> list[str] | None:
     """Get the list of services from the git-ubuntu service folder.
@@ -27,16 +39,16 @@ def _get_services_list(service_folder: str) -> list[str] | None:
     Returns:
         A list of service names or None if checking the folder failed.
     """
-    service_folder_path = pathops.LocalPath(service_folder)
     collected_services = True
     service_list = []
 
     try:
-        for service_file in service_folder_path.iterdir():
-            if service_file.suffix == ".service":
-                service_list.append(service_file.name)
-            else:
-                logger.debug("Skipping non-service file %s", service_file.name)
+        with os.scandir(service_folder) as entries:
+            for entry in entries:
+                if entry.name.endswith(".service"):
+                    service_list.append(entry.name)
+                else:
+                    logger.debug("Skipping non-service file %s", entry.name)
     except NotADirectoryError:
         logger.error("The provided location %s is not a directory.", service_folder)
         collected_services = False
@@ -120,50 +132,96 @@ def generate_systemd_service_string(
     Returns:
         The service file contents as a string.
     """
-    service_lines = [
-        "[Unit]",
-        f"Description={description}",
-        "",
-        "[Service]",
-        f"User={service_user}",
-        f"Group={service_group}",
-        f"Type={service_type}",
-        f"ExecStart={exec_start}",
-    ]
-
-    if service_restart is not None:
-        service_lines.append(f"Restart={service_restart}")
+    optional_fields = (
+        ("Restart", service_restart),
+        ("RestartSec", restart_sec),
+        ("TimeoutStartSec", timeout_start_sec),
+        ("TimeoutAbortSec", timeout_abort_sec),
+        ("WatchdogSec", watchdog_sec),
+        ("WatchdogSignal", watchdog_signal),
+        ("RuntimeDirectory", runtime_dir),
+        ("PrivateTmp", _PRIVATE_TMP_VALUES[private_tmp]),
+        ("Environment", environment),
+    )
 
-    if restart_sec is not None:
-        service_lines.append(f"RestartSec={restart_sec}")
+    service_string = _SERVICE_HEADER_TEMPLATE.format(
+        description, service_user, service_group, service_type, exec_start
+    ) + "".join(f"\n{key}={value}" for key, value in optional_fields if value is not None)
 
-    if timeout_start_sec is not None:
-        service_lines.append(f"TimeoutStartSec={timeout_start_sec}")
+    if wanted_by is not None:
+        service_string += f"\n\n[Install]\nWantedBy={wanted_by}"
+
+    return service_string
+
+
+# Service file contents with the per-node fields left as str.format placeholders, so setting
+# up a service only substitutes those fields instead of assembling the whole file.
+_BROKER_SERVICE_TEMPLATE = generate_systemd_service_string(
+    "git-ubuntu importer service broker",
+    "{user}",
+    "{group}",
+    "simple",
+    "/snap/bin/git-ubuntu importer-service-broker tcp://*:{broker_port}",
+    service_restart="always",
+    environment="PYTHONUNBUFFERED=1",
+    runtime_dir="git-ubuntu",
+    wanted_by="multi-user.target",
+)
 
-    if timeout_abort_sec is not None:
-        service_lines.append(f"TimeoutAbortSec={timeout_abort_sec}")
+_POLLER_SERVICE_TEMPLATE = generate_systemd_service_string(
+    "git-ubuntu importer service poller",
+    "{user}",
+    "{group}",
+    "notify",
+    "/snap/bin/git-ubuntu importer-service-poller --denylist {denylist}",
+    timeout_start_sec=1200,
+    service_restart="always",
+    restart_sec=60,
+    watchdog_sec=86400,
+    environment="{environment}",
+    wanted_by="multi-user.target",
+)
 
-    if watchdog_sec is not None:
-        service_lines.append(f"WatchdogSec={watchdog_sec}")
+_WORKER_SERVICE_TEMPLATE = generate_systemd_service_string(
+    "git-ubuntu importer service worker",
+    "{user}",
+    "{group}",
+    "notify",
+    "/snap/bin/git-ubuntu importer-service-worker{publish_arg} %i {broker_url}",
+    service_restart="always",
+    restart_sec=60,
+    watchdog_sec=259200,
+    timeout_abort_sec=600,
+    watchdog_signal="SIGINT",
+    private_tmp=True,
+    environment="{environment}",
+    wanted_by="multi-user.target",
+)
 
-    if watchdog_signal is not None:
-        service_lines.append(f"WatchdogSignal={watchdog_signal}")
+# Every service template, so an upgraded charm can tell that the generated files have changed.
+SERVICE_TEMPLATES = (_BROKER_SERVICE_TEMPLATE, _POLLER_SERVICE_TEMPLATE, _WORKER_SERVICE_TEMPLATE)
 
-    if runtime_dir is not None:
-        service_lines.append(f"RuntimeDirectory={runtime_dir}")
+BROKER_SERVICE_FILENAME = "git-ubuntu-importer-service-broker.service"
+POLLER_SERVICE_FILENAME = "git-ubuntu-importer-service-poller.service"
+WORKER_SERVICE_FILENAME = "git-ubuntu-importer-service-worker@.service"
 
-    if private_tmp:
-        service_lines.append("PrivateTmp=yes")
-    elif private_tmp is not None:
-        service_lines.append("PrivateTmp=no")
 
-    if environment is not None:
-        service_lines.append(f"Environment={environment}")
+def _setup_service(home_dir: str, filename: str, template: str, **fields: str | int) -> bool:
+    """Fill in a service file template and create the service file in the services folder.
 
-    if wanted_by is not None:
-        service_lines.append(f"\n[Install]\nWantedBy={wanted_by}")
+    Args:
+        home_dir: The home directory of the user.
+        filename: The name of the service file.
+        template: The service file template.
+        fields: The values for the template placeholders.
 
-    return "\n".join(service_lines)
+    Returns:
+        True if setup succeeded, False otherwise.
+    """
+    services_folder = pathops.LocalPath(home_dir, "services")
+    return create_systemd_service_file(
+        filename, services_folder.as_posix(), template.format(**fields)
+    )
 
 
 def setup_broker_service(
@@ -183,24 +241,15 @@ def setup_broker_service(
     Returns:
         True if setup succeeded, False otherwise.
     """
-    filename = "git-ubuntu-importer-service-broker.service"
-    exec_start = f"/snap/bin/git-ubuntu importer-service-broker tcp://*:{broker_port}"
-
-    service_string = generate_systemd_service_string(
-        "git-ubuntu importer service broker",
-        user,
-        group,
-        "simple",
-        exec_start,
-        service_restart="always",
-        environment="PYTHONUNBUFFERED=1",
-        runtime_dir="git-ubuntu",
-        wanted_by="multi-user.target",
+    return _setup_service(
+        home_dir,
+        BROKER_SERVICE_FILENAME,
+        _BROKER_SERVICE_TEMPLATE,
+        user=user,
+        group=group,
+        broker_port=broker_port,
     )
 
-    services_folder = pathops.LocalPath(home_dir, "services")
-    return create_systemd_service_file(filename, services_folder.as_posix(), service_string)
-
 
 def setup_poller_service(
     home_dir: str,
@@ -223,34 +272,20 @@ def setup_poller_service(
     Returns:
         True if setup succeeded, False otherwise.
     """
-    filename = "git-ubuntu-importer-service-poller.service"
-    exec_start = f"/snap/bin/git-ubuntu importer-service-poller --denylist {denylist}"
-
-    environment = "PYTHONUNBUFFERED=1"
-
-    if http_proxy != "":
-        environment = f"http_proxy={http_proxy} " + environment
-
-    if https_proxy != "":
-        environment = f"https_proxy={https_proxy} " + environment
-
-    service_string = generate_systemd_service_string(
-        "git-ubuntu importer service poller",
-        user,
-        group,
-        "notify",
-        exec_start,
-        timeout_start_sec=1200,
-        service_restart="always",
-        restart_sec=60,
-        watchdog_sec=86400,
+    http_proxy_env = f"http_proxy={http_proxy} " if http_proxy else ""
+    https_proxy_env = f"https_proxy={https_proxy} " if https_proxy else ""
+    environment = f"{https_proxy_env}{http_proxy_env}PYTHONUNBUFFERED=1"
+
+    return _setup_service(
+        home_dir,
+        POLLER_SERVICE_FILENAME,
+        _POLLER_SERVICE_TEMPLATE,
+        user=user,
+        group=group,
+        denylist=denylist,
         environment=environment,
-        wanted_by="multi-user.target",
     )
 
-    services_folder = pathops.LocalPath(home_dir, "services")
-    return create_systemd_service_file(filename, services_folder.as_posix(), service_string)
-
 
 def setup_worker_service(
     home_dir: str,
@@ -277,39 +312,26 @@ def setup_worker_service(
     Returns:
         True if setup succeeded, False otherwise.
     """
-    filename = "git-ubuntu-importer-service-worker@.service"
-
     publish_arg = " --no-push" if not push_to_lp else ""
     broker_url = f"tcp://{broker_ip}:{broker_port}"
-    exec_start = f"/snap/bin/git-ubuntu importer-service-worker{publish_arg} %i {broker_url}"
-
-    environment = f"HOME={home_dir} PYTHONUNBUFFERED=1"
-
-    if lp_credentials_filename != "":
-        environment = f"LP_CREDENTIALS_FILE={lp_credentials_filename} " + environment
-
-    if https_proxy != "":
-        environment = f"https_proxy={https_proxy} " + environment
-
-    service_string = generate_systemd_service_string(
-        "git-ubuntu importer service worker",
-        user,
-        group,
-        "notify",
-        exec_start,
-        service_restart="always",
-        restart_sec=60,
-        watchdog_sec=259200,
-        timeout_abort_sec=600,
-        watchdog_signal="SIGINT",
-        private_tmp=True,
+
+    https_proxy_env = f"https_proxy={https_proxy} " if https_proxy else ""
+    credentials_env = (
+        f"LP_CREDENTIALS_FILE={lp_credentials_filename} " if lp_credentials_filename else ""
+    )
+    environment = f"{https_proxy_env}{credentials_env}HOME={home_dir} PYTHONUNBUFFERED=1"
+
+    return _setup_service(
+        home_dir,
+        WORKER_SERVICE_FILENAME,
+        _WORKER_SERVICE_TEMPLATE,
+        user=user,
+        group=group,
+        publish_arg=publish_arg,
+        broker_url=broker_url,
         environment=environment,
-        wanted_by="multi-user.target",
     )
 
-    services_folder = pathops.LocalPath(home_dir, "services")
-    return create_systemd_service_file(filename, services_folder.as_posix(), service_string)
-
 
 def start_services(service_folder: str, node_id: int, num_workers: int) -> bool:
     """Start all git-ubuntu services and wait for startup to complete.
@@ -329,22 +351,14 @@ def start_services(service_folder: str, node_id: int, num_workers: int) -> bool:
 
     service_list = _expand_service_list_for_workers(service_list, node_id, num_workers)
 
-    services_started = True
-
-    # Start services
-    for service in service_list:
-        if start_service(service):
-            logger.info("Started service %s.", service)
-        else:
-            logger.error("Failed to start service %s", service)
-            services_started = False
-
-    if not services_started:
+    if not start_service_units(service_list):
         return False
 
-    # Wait for startup
+    # The services start concurrently, so wait for all of them against one shared deadline.
+    deadline = time.monotonic() + SERVICE_STARTUP_TIMEOUT_SEC
+
     for service in service_list:
-        if wait_for_service_active(service, 30):
+        if wait_for_service_active(service, max(deadline - time.monotonic(), 0)):
             logger.info("Service %s startup complete.", service)
         else:
             logger.error("Service %s startup failed.", service)
@@ -367,20 +381,39 @@ def stop_services(service_folder: str) -> bool:
     if service_list is None:
         return False
 
-    services_stopped = True
+    # Glob worker service instances
+    service_list = [service.replace("@.service", "@*") for service in service_list]
 
-    for service in service_list:
-        # Glob worker services
-        if "@.service" in service:
-            service = f"'{service.replace('@.service', '@*')}'"
+    return stop_service_units(service_list)
 
-        if stop_service(service):
-            logger.info("Stopped service %s", service)
-        else:
-            logger.error("Failed to stop service %s", service)
-            services_stopped = False
 
-    return services_stopped
+def _remove_service_files(folder: str, service_list: list[str]) -> bool:
+    """Remove service files from a folder, skipping any that are already gone.
+
+    Args:
+        folder: The folder containing the service files.
+        service_list: The names of the service files to remove.
+
+    Returns:
+        True if all service files were removed, False otherwise.
+    """
+    files_removed = False
+
+    try:
+        for service in service_list:
+            try:
+                os.unlink(os.path.join(folder, service))
+            except FileNotFoundError:
+                pass
+        files_removed = True
+    except NotADirectoryError:
+        logger.error("The provided location %s is not a directory.", folder)
+    except PermissionError as e:
+        logger.error("Failed to remove services due to permission issues: %s", str(e))
+    except OSError as e:
+        logger.error("Failed to remove a service file due to error: %s", str(e))
+
+    return files_removed
 
 
 def destroy_services(service_folder: str) -> bool:
@@ -397,38 +430,7 @@ def destroy_services(service_folder: str) -> bool:
     if service_list is None:
         return False
 
-    service_folder_path = pathops.LocalPath(service_folder)
-    systemd_service_path = pathops.LocalPath("/etc/systemd/system/")
-
-    services_folder_services_removed = False
-    systemd_folder_services_removed = False
-
-    # Remove from service folder
-    try:
-        for service in service_list:
-            pathops.LocalPath(service_folder_path, service).unlink(missing_ok=True)
-        services_folder_services_removed = True
-    except NotADirectoryError:
-        logger.error("The provided location %s is not a directory.", service_folder)
-    except PermissionError as e:
-        logger.error("Failed to start services due to permission issues: %s", str(e))
-    except FileNotFoundError:
-        logger.error("Service folder not found.")
-    except (IOError, OSError) as e:
-        logger.error("Failed to remove a service file due to error: %s", str(e))
-
-    # Remove from /etc/systemd/system
-    try:
-        for service in service_list:
-            pathops.LocalPath(systemd_service_path, service).unlink(missing_ok=True)
-        systemd_folder_services_removed = True
-    except NotADirectoryError:
-        logger.error("/etc/systemd/system is not a directory.")
-    except PermissionError as e:
-        logger.error("Failed to start services due to permission issues: %s", str(e))
-    except FileNotFoundError:
-        logger.error("/etc/systemd/system folder not found.")
-    except (IOError, OSError) as e:
-        logger.error("Failed to remove a service file due to error: %s", str(e))
+    services_folder_services_removed = _remove_service_files(service_folder, service_list)
+    systemd_folder_services_removed = _remove_service_files(SYSTEMD_SYSTEM_DIR, service_list)
 
     return services_folder_services_removed and systemd_folder_services_removed
@@ -4,14 +4,106 @@
 
 """Manager of files and git-ubuntu instances on the local system."""
 
+import hashlib
 import logging
 
 from charmlibs import pathops
 
 import git_ubuntu
+from service_management import SYSTEMD_SYSTEM_DIR, daemon_reload
 
 logger = logging.getLogger(__name__)
 
+NODE_CONFIG_DIGEST_FILENAME = ".importer-node-config-digest"
+
+# Location of the poller's package denylist within the git-ubuntu user's home directory.
+PACKAGE_DENYLIST_PATH = "live-allowlist-denylist-source/gitubuntu/source-package-denylist.txt"
+
+
+def get_config_digest(*settings: object) -> str:
+    """Get a stable digest of the settings used to set up the node's services.
+
+    The service templates are part of the digest, so a charm upgrade that changes the generated
+    service files also changes the digest.
+
+    Args:
+        settings: The values that the installed services depend on.
+
+    Returns:
+        The digest as a hex string.
+    """
+    digest_input = repr((git_ubuntu.SERVICE_TEMPLATES, settings)).encode()
+    return hashlib.blake2b(digest_input, digest_size=16).hexdigest()
+
+
+def is_config_current(git_ubuntu_user_home: str, is_primary: bool, config_digest: str) -> bool:
+    """Check if the services were last set up with the given settings digest and still exist.
+
+    Args:
+        git_ubuntu_user_home: The home directory of the git-ubuntu user.
+        is_primary: True if the node runs the primary services, False for worker services.
+        config_digest: The digest of the settings to compare against.
+
+    Returns:
+        True if the stored digest matches and all service files are in place, False otherwise.
+    """
+    digest_file = pathops.LocalPath(git_ubuntu_user_home, NODE_CONFIG_DIGEST_FILENAME)
+
+    try:
+        if digest_file.read_text(encoding="utf-8") != config_digest:
+            return False
+    except OSError:
+        return False
+
+    if is_primary:
+        service_files = [git_ubuntu.BROKER_SERVICE_FILENAME, git_ubuntu.POLLER_SERVICE_FILENAME]
+    else:
+        service_files = [git_ubuntu.WORKER_SERVICE_FILENAME]
+
+    # Service files removed outside the charm need to be set up again.
+    for filename in service_files:
+        service_file = pathops.LocalPath(git_ubuntu_user_home, "services", filename)
+        linked_file = pathops.LocalPath(SYSTEMD_SYSTEM_DIR, filename)
+
+        if not service_file.is_file() or not linked_file.is_file():
+            logger.info("Service file %s is missing.", filename)
+            return False
+
+    return True
+
+
+def save_config_digest(git_ubuntu_user_home: str, config_digest: str) -> None:
+    """Record the settings digest for the services that were just set up.
+
+    Args:
+        git_ubuntu_user_home: The home directory of the git-ubuntu user.
+        config_digest: The digest of the settings used for setup.
+    """
+    digest_file = pathops.LocalPath(git_ubuntu_user_home, NODE_CONFIG_DIGEST_FILENAME)
+
+    try:
+        digest_file.write_text(config_digest, encoding="utf-8", user="root", group="root")
+    except (OSError, LookupError) as e:
+        logger.warning("Failed to save importer node config digest: %s", str(e))
+
+
+def denylist_exists(git_ubuntu_user_home: str) -> bool:
+    """Check if the poller's package denylist is present in the git-ubuntu source.
+
+    Args:
+        git_ubuntu_user_home: The home directory of the git-ubuntu user.
+
+    Returns:
+        True if the denylist file exists, False otherwise.
+    """
+    denylist = pathops.LocalPath(git_ubuntu_user_home, PACKAGE_DENYLIST_PATH)
+
+    if not denylist.is_file():
+        logger.error("Package denylist %s not found.", denylist.as_posix())
+        return False
+
+    return True
+
 
 def setup_secondary_node(
     git_ubuntu_user_home: str,
@@ -49,7 +141,7 @@ def setup_secondary_node(
         logger.error("Failed to setup worker service file.")
         return False
 
-    return True
+    return daemon_reload()
 
 
 def setup_primary_node(
@@ -71,6 +163,8 @@ def setup_primary_node(
     Returns:
         True if installation succeeded, False otherwise.
     """
+    denylist = pathops.LocalPath(git_ubuntu_user_home, PACKAGE_DENYLIST_PATH)
+
     # Setup broker service.
     if not git_ubuntu.setup_broker_service(
         git_ubuntu_user_home,
@@ -81,11 +175,6 @@ def setup_primary_node(
         logger.error("Failed to setup broker service.")
         return False
 
-    denylist = pathops.LocalPath(
-        git_ubuntu_user_home,
-        "live-allowlist-denylist-source/gitubuntu/source-package-denylist.txt",
-    )
-
     # Setup poller service.
     if not git_ubuntu.setup_poller_service(
         git_ubuntu_user_home,
@@ -98,7 +187,8 @@ def setup_primary_node(
         logger.error("Failed to setup poller service.")
         return False
 
-    return True
+    # Load both new services with a single reload.
+    return daemon_reload()
 
 
 def start(git_ubuntu_user_home: str, node_id: int, num_workers: int) -> bool:
@@ -133,6 +223,9 @@ def reset(git_ubuntu_user_home: str) -> bool:
     """
     services_folder = pathops.LocalPath(git_ubuntu_user_home, "services")
 
+    # Services are about to change, so the stored digest no longer describes them.
+    pathops.LocalPath(git_ubuntu_user_home, NODE_CONFIG_DIGEST_FILENAME).unlink(missing_ok=True)
+
     if not git_ubuntu.stop_services(services_folder.as_posix()):
         logger.error("Failed to stop all services.")
         return False
@@ -6,6 +6,8 @@
 
 import re
 
+_LP_USERNAME_RE = re.compile(r"\A[a-z0-9.\-+]+\Z")
+
 
 def is_valid_lp_username(lp_username: str) -> bool:
     """Check if the given launchpad username is valid.
@@ -18,6 +20,4 @@ def is_valid_lp_username(lp_username: str) -> bool:
     Returns:
         True if the username is valid, False otherwise.
     """
-    if not re.match(r"^[a-z0-9\.\-\+]+$", lp_username):
-        return False
-    return True
+    return _LP_USERNAME_RE.match(lp_username) is not None
@@ -5,6 +5,9 @@
 """Snap and Apt package installation and update functions."""
 
 import logging
+import os
+import subprocess
+from functools import lru_cache
 from pathlib import Path
 from shutil import copy
 
@@ -14,55 +17,42 @@ from charms.operator_libs_linux.v2 import snap
 logger = logging.getLogger(__name__)
 
 
-def git_install() -> bool:
-    """Install git from apt.
+def install_packages(packages: list[str]) -> bool:
+    """Install a set of packages from apt in a single apt-get transaction.
 
-    Returns:
-        True if git install succeeded, False otherwise.
-    """
-    try:
-        apt.update()
-        apt.add_package("git")
-        logger.info("Installed git package.")
-    except apt.PackageError as e:
-        logger.error("Failed to install git from apt: %s", e)
-        return False
-
-    return True
-
-
-def sqlite3_install() -> bool:
-    """Install sqlite3 from apt.
+    Args:
+        packages: The names of the packages to install.
 
     Returns:
-        True if sqlite3 install succeeded, False otherwise.
+        True if all packages were installed, False otherwise.
     """
     try:
         apt.update()
-        apt.add_package("sqlite3")
-        logger.info("Installed sqlite3 package.")
-    except apt.PackageError as e:
-        logger.error("Failed to install sqlite3 from apt: %s", e)
+        # apt.add_package runs apt-get once per package, so install the whole set at once.
+        subprocess.run(
+            ["apt-get", "-y", "--option=Dpkg::Options::=--force-confold", "install", *packages],
+            capture_output=True,
+            check=True,
+            text=True,
+            env={**os.environ, "DEBIAN_FRONTEND": "noninteractive"},
+        )
+
+        logger.info("Installed packages: %s.", ", ".join(packages))
+    except subprocess.CalledProcessError as e:
+        logger.error("Failed to install %s from apt: %s", ", ".join(packages), e.stderr)
         return False
 
     return True
 
 
-def socat_install() -> bool:
-    """Install socat from apt.
+@lru_cache(maxsize=1)
+def _snap_cache() -> snap.SnapCache:
+    """Get the snap cache, building it only once per hook execution.
 
     Returns:
-        True if socat install succeeded, False otherwise.
+        The shared snap cache.
     """
-    try:
-        apt.update()
-        apt.add_package("socat")
-        logger.info("Installed socat package.")
-    except apt.PackageError as e:
-        logger.error("Failed to install socat from apt: %s", e)
-        return False
-
-    return True
+    return snap.SnapCache()
 
 
 def git_ubuntu_snap_refresh(channel: str) -> bool:
@@ -75,8 +65,13 @@ def git_ubuntu_snap_refresh(channel: str) -> bool:
         True if the snap install succeeded, False otherwise.
     """
     try:
-        cache = snap.SnapCache()
-        git_ubuntu_snap = cache["git-ubuntu"]
+        git_ubuntu_snap = _snap_cache()["git-ubuntu"]
+
+        # Avoid a snap store round trip when already tracking the requested channel.
+        if git_ubuntu_snap.present and git_ubuntu_snap.channel.removeprefix("latest/") == channel:
+            logger.info("git-ubuntu snap already installed from channel %s.", channel)
+            return True
+
         git_ubuntu_snap.ensure(snap.SnapState.Latest, classic=True, channel=channel)
         logger.info("Refreshed git-ubuntu snap to channel %s.", channel)
     except snap.SnapError as e:
@@ -6,30 +6,43 @@
 
 import logging
 import time
-from os import link
+from os import link, replace
 
 from charmlibs import pathops
 from charms.operator_libs_linux.v1 import systemd
 
 logger = logging.getLogger(__name__)
 
+SYSTEMD_SYSTEM_DIR = "/etc/systemd/system"
+
 
 def create_systemd_service_file(filename: str, local_folder: str, file_content: str) -> bool:
     """Create a systemd service file in a local folder, linking to the service files directory.
 
+    systemd is not reloaded, so callers should run daemon_reload once all of their service files
+    are in place.
+
     Args:
         filename: The name of the service file to create.
         local_folder: The local folder to create the file in.
         file_content: The content of the service file.
 
     Returns:
-        True if the file was created, False otherwise.
+        True if the file was created and linked, False otherwise.
     """
+    service_file = pathops.LocalPath(local_folder, filename)
+    linked_file = pathops.LocalPath(SYSTEMD_SYSTEM_DIR, filename)
+
+    # Write to temporary names and rename them into place, so systemd never reads a partially
+    # written unit and an existing link is replaced rather than rejected.
+    temp_file = pathops.LocalPath(local_folder, f".{filename}.tmp")
+    temp_link = pathops.LocalPath(SYSTEMD_SYSTEM_DIR, f".{filename}.tmp")
+
     file_created = False
 
     try:
-        service_file = pathops.LocalPath(local_folder, filename)
-        service_file.write_text(file_content, encoding="utf-8", user="root", group="root")
+        temp_file.write_bytes(file_content.encode("utf-8"), user="root", group="root")
+        replace(temp_file, service_file)
         logger.info("Created service file at %s.", service_file)
         file_created = True
     except (FileNotFoundError, NotADirectoryError) as e:
@@ -44,6 +57,8 @@ def create_systemd_service_file(filename: str, local_folder: str, file_content:
         logger.error(
             "Failed to create service file %s due to permission issues: %s", filename, str(e)
         )
+    except OSError as e:
+        logger.error("Failed to create service file %s due to OS error: %s", filename, str(e))
 
     if not file_created:
         return False
@@ -52,14 +67,11 @@ def create_systemd_service_file(filename: str, local_folder: str, file_content:
     file_linked = False
 
     try:
-        link(
-            pathops.LocalPath(local_folder, filename),
-            pathops.LocalPath("/etc/systemd/system", filename),
-        )
-        logger.info("Linked service file to /etc/systemd/system.")
+        temp_link.unlink(missing_ok=True)
+        link(service_file, temp_link)
+        replace(temp_link, linked_file)
+        logger.info("Linked service file to %s.", SYSTEMD_SYSTEM_DIR)
         file_linked = True
-    except FileExistsError:
-        logger.error("Service file %s link already exists", filename)
     except PermissionError as e:
         logger.error(
             "Failed to create service file link %s due to permission issues: %s", filename, str(e)
@@ -67,54 +79,66 @@ def create_systemd_service_file(filename: str, local_folder: str, file_content:
     except OSError as e:
         logger.error("Failed to create service file link %s due to OS error: %s", filename, str(e))
 
-    return file_linked and daemon_reload()
+    return file_linked
 
 
-def start_service(service_name: str) -> bool:
-    """Attempt to start a systemd service and confirm it is running.
+def start_service_units(service_names: list[str]) -> bool:
+    """Start a set of systemd services with a single systemctl call.
+
+    Services that are already running are left alone by systemctl.
 
     Args:
-        service_name: The name of the service to start.
+        service_names: The names of the services to start.
 
     Returns:
-        True if the service was started successfully, False otherwise.
+        True if the services were started successfully, False otherwise.
     """
+    if not service_names:
+        return True
+
     try:
-        if not systemd.service_running(service_name):
-            logger.info("Starting systemd service %s.", service_name)
-            return systemd.service_start(service_name)
+        logger.info("Starting systemd services %s.", ", ".join(service_names))
+        return systemd.service_start(*service_names)
     except systemd.SystemdError as e:
-        logger.error("Failed to start %s: %s", service_name, str(e))
-        return False
+        logger.error("Failed to start services: %s", str(e))
 
-    logger.debug("Systemd service %s is already running, leaving it alone.", service_name)
-    return True
+    return False
 
 
-def stop_service(service_name: str) -> bool:
-    """Attempt to stop a systemd service and confirm it is stopped.
+def stop_service_units(service_names: list[str]) -> bool:
+    """Stop a set of systemd services with a single systemctl call.
+
+    Names may be unit globs, which only match loaded units. Plain names are only stopped if
+    they are running, since systemctl fails to stop a unit that is not loaded, such as one
+    whose link in the systemd directory is missing.
 
     Args:
-        service_name: The name of the service to stop.
+        service_names: The names or glob patterns of the services to stop.
 
     Returns:
-        True if the service was stopped successfully, False otherwise.
+        True if the services were stopped successfully, False otherwise.
     """
+    service_names = [
+        service for service in service_names if "*" in service or systemd.service_running(service)
+    ]
+
+    if not service_names:
+        return True
+
     try:
-        if systemd.service_running(service_name):
-            logger.info("Stopping systemd service %s.", service_name)
-            return systemd.service_stop(service_name)
+        logger.info("Stopping systemd services %s.", ", ".join(service_names))
+        return systemd.service_stop(*service_names)
     except systemd.SystemdError as e:
-        logger.error("Failed to stop %s: %s", service_name, str(e))
-        return False
+        logger.error("Failed to stop services: %s", str(e))
 
-    logger.debug("Systemd service %s is not running, leaving it alone.", service_name)
-    return True
+    return False
 
 
-def wait_for_service_active(service_name: str, timeout_sec: int) -> bool:
+def wait_for_service_active(service_name: str, timeout_sec: float) -> bool:
     """Wait until a systemd service is active.
 
+    The service is always checked at least once, even if the timeout has already run out.
+
     Args:
         service_name: The name of the service to wait for.
         timeout_sec: The cutoff time for failure.
@@ -124,13 +148,19 @@ def wait_for_service_active(service_name: str, timeout_sec: int) -> bool:
     """
     logger.info("Waiting for service %s to start...", service_name)
 
-    start_time = time.time()
-    while time.time() - start_time < timeout_sec:
+    start_time = time.monotonic()
+    while True:
         if systemd.service_running(service_name):
             logger.info(
-                "Service %s started, took %d seconds.", service_name, int(time.time() - start_time)
+                "Service %s started, took %d seconds.",
+                service_name,
+                int(time.monotonic() - start_time),
             )
             return True
+
+        if time.monotonic() - start_time >= timeout_sec:
+            break
+
         time.sleep(1)
 
     logger.error("Failed to start service %s within %d seconds.", service_name, timeout_sec)
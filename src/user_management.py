@@ -5,6 +5,7 @@
 """Machine user management functions."""
 
 import logging
+import stat
 import subprocess
 
 from charmlibs import pathops
@@ -12,13 +13,16 @@ from charms.operator_libs_linux.v0 import passwd
 
 logger = logging.getLogger(__name__)
 
+# Use git wire protocol v2 so the server only advertises the refs that are requested.
+_GIT_FETCH_OPTIONS = ("-c", "protocol.version=2")
 
-def _run_command_as_user(user: str, command: str, env: dict[str, str] | None = None) -> bool:
-    """Run a command as a user.
+
+def _run_command_as_user(user: str, command: list[str], env: dict[str, str] | None = None) -> bool:
+    """Run a command as a user without invoking a shell.
 
     Args:
         user: The user to run the command as.
-        command: The command to run.
+        command: The command to run as an argument list.
         env: Dictionary of environment variables to set for the command.
 
     Returns:
@@ -32,16 +36,15 @@ def _run_command_as_user(user: str, command: str, env: dict[str, str] | None = N
             capture_output=True,
             text=True,
             check=False,
-            shell=True,
         )
     except OSError:
-        logger.exception("Failed to execute command %s as user %s", command, user)
+        logger.exception("Failed to execute command %s as user %s", " ".join(command), user)
         return False
 
     if result.returncode != 0:
         logger.error(
             "Command %s exited with result %d - stdout: %s - stderr: %s",
-            command,
+            " ".join(command),
             result.returncode,
             result.stdout,
             result.stderr,
@@ -141,7 +144,7 @@ def refresh_git_ubuntu_source(
         # Update origin to the current source url
         if not _run_command_as_user(
             user,
-            f"git -C {clone_dir.as_posix()} remote set-url origin {source_url}",
+            ["git", "-C", clone_dir.as_posix(), "remote", "set-url", "origin", source_url],
             {"HOME": home_dir},
         ):
             logger.error("Failed to update git-ubuntu source origin.")
@@ -152,7 +155,9 @@ def refresh_git_ubuntu_source(
         if https_proxy != "":
             env["HTTPS_PROXY"] = https_proxy
 
-        if not _run_command_as_user(user, f"git -C {clone_dir.as_posix()} pull", env):
+        if not _run_command_as_user(
+            user, ["git", *_GIT_FETCH_OPTIONS, "-C", clone_dir.as_posix(), "pull"], env
+        ):
             logger.error("Failed to update existing git-ubuntu source.")
             return False
 
@@ -163,14 +168,73 @@ def refresh_git_ubuntu_source(
     if https_proxy != "":
         env["HTTPS_PROXY"] = https_proxy
 
+    # Only the checked out files are used, so skip downloading the blobs of older revisions.
     logger.info("Cloning git-ubuntu source to %s", clone_dir.as_posix())
-    if not _run_command_as_user(user, f"git clone {source_url} {clone_dir.as_posix()}", env):
+    if not _run_command_as_user(
+        user,
+        [
+            "git",
+            *_GIT_FETCH_OPTIONS,
+            "clone",
+            "--filter=blob:none",
+            source_url,
+            clone_dir.as_posix(),
+        ],
+        env,
+    ):
         logger.error("Failed to clone git-ubuntu source.")
         return False
 
     return True
 
 
+def _write_secret_file(
+    secret_file: pathops.LocalPath, secret_data: str, user: str, description: str
+) -> bool:
+    """Write a private file for a user, skipping the write if it is already up to date.
+
+    The write is only skipped when the content, mode and ownership all match, so a
+    refresh still repairs permissions changed outside the charm.
+
+    Args:
+        secret_file: The file to write.
+        secret_data: The private data to store.
+        user: The user who should own the file.
+        description: A short description of the file for log messages.
+
+    Returns:
+        True if the file holds the given data, False otherwise.
+    """
+    try:
+        if (
+            secret_file.read_text(encoding="utf-8") == secret_data
+            and stat.S_IMODE(secret_file.stat().st_mode) == 0o600
+            and secret_file.owner() == user
+            and secret_file.group() == user
+        ):
+            logger.debug("%s is unchanged, skipping write.", description)
+            return True
+    except (OSError, UnicodeDecodeError, KeyError):
+        pass
+
+    try:
+        secret_file.write_text(
+            secret_data,
+            mode=0o600,
+            user=user,
+            group=user,
+        )
+        return True
+    except (FileNotFoundError, NotADirectoryError) as e:
+        logger.error("Failed to create %s due to directory issues: %s", description, str(e))
+    except LookupError as e:
+        logger.error("Failed to create %s due to issues with root user: %s", description, str(e))
+    except PermissionError as e:
+        logger.error("Failed to create %s due to permission issues: %s", description, str(e))
+
+    return False
+
+
 def update_ssh_private_key(user: str, home_dir: str, ssh_key_data: str) -> bool:
     """Create or refresh the .ssh/id private key file for launchpad access.
 
@@ -189,24 +253,7 @@ def update_ssh_private_key(user: str, home_dir: str, ssh_key_data: str) -> bool:
     if not _mkdir_for_user_with_error_checking(parent_dir, user, 0o700):
         return False
 
-    key_success = False
-
-    try:
-        ssh_key_file.write_text(
-            ssh_key_data,
-            mode=0o600,
-            user=user,
-            group=user,
-        )
-        key_success = True
-    except (FileNotFoundError, NotADirectoryError) as e:
-        logger.error("Failed to create ssh private key due to directory issues: %s", str(e))
-    except LookupError as e:
-        logger.error("Failed to create ssh private key due to issues with root user: %s", str(e))
-    except PermissionError as e:
-        logger.error("Failed to create ssh private key due to permission issues: %s", str(e))
-
-    return key_success
+    return _write_secret_file(ssh_key_file, ssh_key_data, user, "ssh private key")
 
 
 def update_launchpad_credentials_secret(user: str, home_dir: str, lp_key_data: str) -> bool:
@@ -227,25 +274,7 @@ def update_launchpad_credentials_secret(user: str, home_dir: str, lp_key_data: s
     if not _mkdir_for_user_with_error_checking(parent_dir, user, 0o700):
         return False
 
-    key_success = False
-
-    try:
-        lp_key_file.write_text(
-            lp_key_data,
-            mode=0o600,
-            user=user,
-            group=user,
-        )
-        key_success = True
-    except (FileNotFoundError, NotADirectoryError) as e:
-        logger.error("Failed to create lp credentials entry due to directory issues: %s", str(e))
-    except LookupError as e:
-        logger.error(
-            "Failed to create lp credentials entry due to issues with root user: %s", str(e)
-        )
-    except PermissionError as e:
-        logger.error("Failed to create lp credentials entry due to permission issues: %s", str(e))
-    return key_success
+    return _write_secret_file(lp_key_file, lp_key_data, user, "lp credentials entry")
 
 
 def update_ssh_config(user: str, home_dir: str, http_proxy: str = "") -> bool:
@@ -329,52 +358,26 @@ def set_snap_homedirs(home_dir: str) -> bool:
     return True
 
 
-def update_git_user_name(user: str, name: str, home_dir: str) -> bool:
-    """Update the git user full name entry.
-
-    Args:
-        user: The system user to update the config for.
-        name: The full name for the git user.
-        home_dir: The home directory for the user.
-
-    Returns:
-        True if config update succeeded, False otherwise.
-    """
-    logger.info("Setting git user.name to %s for user %s.", name, user)
-    return _run_command_as_user(
-        user, f"git config --global user.name '{name}'", {"HOME": home_dir}
-    )
-
+def update_git_config(user: str, home_dir: str, entries: dict[str, str]) -> bool:
+    """Set entries in the global git config for a user.
 
-def update_git_email(user: str, email: str, home_dir: str) -> bool:
-    """Update the git user email address entry.
+    Each entry is set with git config itself, so git handles quoting and section layout and
+    other settings in ~/.gitconfig are kept.
 
     Args:
         user: The system user to update the config for.
-        email: The email address for the git user.
         home_dir: The home directory for the user.
+        entries: Mapping of git config keys, such as user.name, to their values.
 
     Returns:
         True if config update succeeded, False otherwise.
     """
-    logger.info("Setting git user.email to %s for user %s.", email, user)
-    return _run_command_as_user(
-        user, f"git config --global user.email {email}", {"HOME": home_dir}
-    )
+    for key, value in entries.items():
+        logger.info("Setting git %s to %s for user %s.", key, value, user)
 
+        if not _run_command_as_user(
+            user, ["git", "config", "--global", key, value], {"HOME": home_dir}
+        ):
+            return False
 
-def update_git_ubuntu_lpuser(user: str, lp_username: str, home_dir: str) -> bool:
-    """Update the launchpad user setting for git.
-
-    Args:
-        user: The system user to update the config for.
-        lp_username: The launchpad username set in git.
-        home_dir: The home directory for the user.
-
-    Returns:
-        True if config update succeeded, False otherwise.
-    """
-    logger.info("Setting git gitubuntu.lpuser to %s for user %s.", lp_username, user)
-    return _run_command_as_user(
-        user, f"git config --global gitubuntu.lpuser {lp_username}", {"HOME": home_dir}
-    )
+    return True
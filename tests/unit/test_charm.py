@@ -5,11 +5,20 @@
 
 """Unit tests for git-ubuntu charm."""
 
-from unittest.mock import call, patch
+from subprocess import CalledProcessError
+from unittest.mock import patch
 
-from charmlibs.apt import PackageError
-from ops.testing import ActiveStatus, BlockedStatus, Context, State
-from pytest import fixture
+from ops.testing import (
+    ActiveStatus,
+    BlockedStatus,
+    Context,
+    MaintenanceStatus,
+    PeerRelation,
+    Secret,
+    State,
+    TCPPort,
+)
+from pytest import fixture, mark
 
 from charm import GitUbuntuCharm
 
@@ -27,7 +36,7 @@ def base_state(ctx):
 
 
 @patch("charmlibs.apt.update")
-@patch("charmlibs.apt.add_package")
+@patch("package_installation.subprocess.run")
 @patch("charm.usr.setup_git_ubuntu_user")
 @patch("charm.usr.setup_git_ubuntu_user_services_dir")
 @patch("charm.usr.set_snap_homedirs")
@@ -37,7 +46,7 @@ def test_install_success(
     mock_set_snap_homedirs,
     mock_setup_git_ubuntu_user_services_dir,
     mock_setup_git_ubuntu_user,
-    mock_add_package,
+    mock_run,
     mock_apt_update,
     ctx,
     base_state,
@@ -47,9 +56,10 @@ def test_install_success(
     out = ctx.run(ctx.on.install(), base_state)
 
     assert out.unit_status == ActiveStatus("Install complete.")
+    assert ctx.unit_status_history[1:] == [MaintenanceStatus("Installing git, sqlite3, socat.")]
 
     mock_apt_update.assert_called()
-    mock_add_package.assert_has_calls([call("git"), call("sqlite3"), call("socat")])
+    assert mock_run.call_args.args[0][-4:] == ["install", "git", "sqlite3", "socat"]
     mock_setup_git_ubuntu_user.assert_called_once_with("git-ubuntu", "/var/local/git-ubuntu")
     mock_setup_git_ubuntu_user_services_dir.assert_called_once_with(
         "git-ubuntu", "/var/local/git-ubuntu"
@@ -59,15 +69,15 @@ def test_install_success(
 
 
 @patch("charmlibs.apt.update")
-@patch("charmlibs.apt.add_package")
+@patch("package_installation.subprocess.run")
 def test_install_apt_error(
-    mock_add_package,
+    mock_run,
     mock_update,
     ctx,
     base_state,
 ):
     """Test installation when apt operations fail."""
-    mock_add_package.side_effect = PackageError("Failed to install package")
+    mock_run.side_effect = CalledProcessError(100, "apt-get", stderr="E: failure")
 
     out = ctx.run(ctx.on.install(), base_state)
 
@@ -75,3 +85,251 @@ def test_install_apt_error(
     assert "Failed to install git" in str(out.unit_status.message)
 
     mock_update.assert_called_once()
+
+
+@patch("charm.usr.update_git_config")
+def test_config_changed_invalid_channel(mock_update_git_config, ctx):
+    """Test config-changed blocks on an unknown snap channel before changing anything."""
+    state = State(leader=True, config={"channel": "nightly", "lpuser": "test-user"})
+    out = ctx.run(ctx.on.config_changed(), state)
+
+    assert out.unit_status == BlockedStatus("Invalid channel configured.")
+    mock_update_git_config.assert_not_called()
+
+
+@mark.parametrize("port", [0, 65536])
+@patch("charm.usr.update_git_config")
+def test_config_changed_invalid_port(mock_update_git_config, port, ctx):
+    """Test config-changed blocks on an invalid controller port before changing anything."""
+    state = State(leader=True, config={"controller_port": port})
+    out = ctx.run(ctx.on.config_changed(), state)
+
+    assert out.unit_status == BlockedStatus("Invalid controller port configuration.")
+    mock_update_git_config.assert_not_called()
+
+
+@patch("charm.usr.update_git_config")
+def test_config_changed_invalid_lpuser(mock_update_git_config, ctx):
+    """Test config-changed blocks before writing git config for an invalid lpuser."""
+    state = State(leader=True, config={"lpuser": "Invalid User"})
+    out = ctx.run(ctx.on.config_changed(), state)
+
+    assert out.unit_status == BlockedStatus(
+        "lpuser does not match Launchpad User ID requirements."
+    )
+    mock_update_git_config.assert_not_called()
+
+
+@patch("charm.node.start")
+@patch("charm.node.reset")
+def test_secondary_without_primary_address(mock_reset, mock_start, ctx):
+    """Test a secondary node leaves its services alone until a primary address is shared."""
+    relation = PeerRelation("replicas")
+    state = State(leader=False, relations=[relation])
+
+    out = ctx.run(ctx.on.relation_changed(relation), state)
+
+    assert out.unit_status == BlockedStatus("Secondary node requires a peer relation.")
+    mock_reset.assert_not_called()
+    mock_start.assert_not_called()
+
+
+@patch("charm.GitUbuntuCharm._refresh_importer_node")
+@patch("charm.usr.refresh_git_ubuntu_source")
+@patch("charm.usr.update_ssh_config")
+@patch("charm.usr.update_launchpad_credentials_secret")
+@patch("charm.usr.update_ssh_private_key")
+@patch("charm.pkgs.git_ubuntu_snap_refresh")
+@patch("charm.usr.update_git_config")
+def test_config_changed_installs_secret_keys(
+    mock_update_git_config,
+    mock_git_ubuntu_snap_refresh,
+    mock_update_ssh_private_key,
+    mock_update_launchpad_credentials_secret,
+    mock_update_ssh_config,
+    mock_refresh_git_ubuntu_source,
+    mock_refresh_importer_node,
+    ctx,
+):
+    """Test both lpuser keys are read from the configured secret and installed."""
+    for mock_step in (
+        mock_update_git_config,
+        mock_git_ubuntu_snap_refresh,
+        mock_update_ssh_private_key,
+        mock_update_launchpad_credentials_secret,
+        mock_update_ssh_config,
+        mock_refresh_git_ubuntu_source,
+        mock_refresh_importer_node,
+    ):
+        mock_step.return_value = True
+
+    secret = Secret(tracked_content={"sshkey": "ssh-data", "lpkey": "lp-data"})
+    state = State(leader=True, secrets=[secret], config={"lpuser_secret_id": secret.id})
+
+    ctx.run(ctx.on.config_changed(), state)
+
+    mock_update_ssh_private_key.assert_called_once_with(
+        "git-ubuntu", "/var/local/git-ubuntu", "ssh-data"
+    )
+    mock_update_launchpad_credentials_secret.assert_called_once_with(
+        "git-ubuntu", "/var/local/git-ubuntu", "lp-data"
+    )
+    mock_refresh_importer_node.assert_called_once()
+
+
+@patch("charm.GitUbuntuCharm._refresh_importer_node")
+@patch("charm.GitUbuntuCharm._refresh_git_ubuntu_source")
+@patch("charm.GitUbuntuCharm._refresh_ssh_config")
+@patch("charm.GitUbuntuCharm._refresh_secret_keys")
+@patch("charm.pkgs.git_ubuntu_snap_refresh")
+@patch("charm.usr.update_git_config")
+def test_config_changed_skips_applied_stages(
+    mock_update_git_config,
+    mock_git_ubuntu_snap_refresh,
+    mock_refresh_secret_keys,
+    mock_refresh_ssh_config,
+    mock_refresh_git_ubuntu_source,
+    mock_refresh_importer_node,
+    ctx,
+):
+    """Test git config, snap and port updates are skipped when their options are unchanged."""
+    mock_update_git_config.return_value = True
+    mock_git_ubuntu_snap_refresh.return_value = True
+    mock_refresh_secret_keys.return_value = True
+    mock_refresh_ssh_config.return_value = True
+    mock_refresh_git_ubuntu_source.return_value = True
+
+    state = State(leader=True, config={"channel": "edge", "lpuser": "test-user"})
+    out = ctx.run(ctx.on.config_changed(), state)
+
+    mock_update_git_config.assert_called_once()
+    mock_git_ubuntu_snap_refresh.assert_called_once_with("edge")
+    assert out.opened_ports == frozenset({TCPPort(1692)})
+
+    with patch("ops.Unit.set_ports") as mock_set_ports:
+        out = ctx.run(ctx.on.config_changed(), out)
+
+    mock_set_ports.assert_not_called()
+
+    mock_update_git_config.assert_called_once()
+    mock_git_ubuntu_snap_refresh.assert_called_once_with("edge")
+    assert mock_refresh_importer_node.call_count == 2
+
+    state = State(
+        leader=True,
+        config={"channel": "stable", "lpuser": "test-user"},
+        stored_states=out.stored_states,
+    )
+    ctx.run(ctx.on.config_changed(), state)
+
+    mock_update_git_config.assert_called_once()
+    mock_git_ubuntu_snap_refresh.assert_called_with("stable")
+
+
+@patch("charm.node.start")
+@patch("charm.GitUbuntuCharm._refresh_importer_node")
+def test_leader_elected_shares_bind_address(mock_refresh_importer_node, mock_start, ctx):
+    """Test the new leader publishes its replicas binding address to the peer relation."""
+    mock_refresh_importer_node.return_value = True
+    mock_start.return_value = True
+
+    relation = PeerRelation("replicas")
+    state = State(leader=True, relations=[relation])
+
+    out = ctx.run(ctx.on.leader_elected(), state)
+
+    assert out.get_relation(relation.id).local_app_data["primary_address"] == "192.0.2.0"
+    assert out.unit_status == ActiveStatus("Running git-ubuntu importer primary node.")
+
+
+@patch("charm.node.reset")
+@patch("charm.node.denylist_exists")
+@patch("charm.node.is_config_current")
+def test_primary_missing_denylist_keeps_services(
+    mock_is_config_current, mock_denylist_exists, mock_reset, ctx
+):
+    """Test a primary node blocks without removing its services when the denylist is missing."""
+    mock_is_config_current.return_value = False
+    mock_denylist_exists.return_value = False
+
+    relation = PeerRelation("replicas")
+    state = State(leader=True, relations=[relation])
+
+    out = ctx.run(ctx.on.leader_elected(), state)
+
+    assert out.unit_status == BlockedStatus("Package denylist not found.")
+    mock_denylist_exists.assert_called_once_with("/var/local/git-ubuntu")
+    mock_reset.assert_not_called()
+
+
+@patch("charm.node.reset")
+@patch("charm.node.is_config_current")
+@patch("charm.GitUbuntuCharm._refresh_git_ubuntu_source")
+@patch("charm.GitUbuntuCharm._refresh_ssh_config")
+@patch("charm.GitUbuntuCharm._refresh_secret_keys")
+@patch("charm.pkgs.git_ubuntu_snap_refresh")
+@patch("charm.usr.update_git_config")
+def test_config_changed_unchanged_services_keep_running_status(
+    mock_update_git_config,
+    mock_git_ubuntu_snap_refresh,
+    mock_refresh_secret_keys,
+    mock_refresh_ssh_config,
+    mock_refresh_git_ubuntu_source,
+    mock_is_config_current,
+    mock_reset,
+    ctx,
+):
+    """Test config-changed keeps reporting running services when they are left alone."""
+    for mock_step in (
+        mock_update_git_config,
+        mock_git_ubuntu_snap_refresh,
+        mock_refresh_secret_keys,
+        mock_refresh_ssh_config,
+        mock_refresh_git_ubuntu_source,
+        mock_is_config_current,
+    ):
+        mock_step.return_value = True
+
+    relation = PeerRelation("replicas")
+    state = State(leader=True, relations=[relation], config={"lpuser": "test-user"})
+
+    out = ctx.run(ctx.on.config_changed(), state)
+
+    assert out.unit_status == ActiveStatus("Running git-ubuntu importer primary node.")
+    mock_reset.assert_not_called()
+
+
+@patch("charm.GitUbuntuCharm._refresh_importer_node")
+@patch("charm.GitUbuntuCharm._refresh_git_ubuntu_source")
+@patch("charm.GitUbuntuCharm._refresh_ssh_config")
+@patch("charm.GitUbuntuCharm._refresh_secret_keys")
+@patch("charm.pkgs.git_ubuntu_snap_refresh")
+@patch("charm.usr.update_git_config")
+def test_config_changed_rewrites_git_config_after_identity_change(
+    mock_update_git_config,
+    mock_git_ubuntu_snap_refresh,
+    mock_refresh_secret_keys,
+    mock_refresh_ssh_config,
+    mock_refresh_git_ubuntu_source,
+    mock_refresh_importer_node,
+    ctx,
+):
+    """Test git config is written again when an upgrade changes the git identity."""
+    for mock_step in (
+        mock_update_git_config,
+        mock_git_ubuntu_snap_refresh,
+        mock_refresh_secret_keys,
+        mock_refresh_ssh_config,
+        mock_refresh_git_ubuntu_source,
+        mock_refresh_importer_node,
+    ):
+        mock_step.return_value = True
+
+    state = State(leader=True, config={"lpuser": "test-user"})
+    out = ctx.run(ctx.on.config_changed(), state)
+
+    with patch("charm.GIT_UBUNTU_GIT_EMAIL", "new-bot@example.com"):
+        ctx.run(ctx.on.config_changed(), out)
+
+    assert mock_update_git_config.call_count == 2
+    assert mock_update_git_config.call_args.args[2]["user.email"] == "new-bot@example.com"
@@ -8,10 +8,13 @@
 from unittest.mock import patch
 
 from git_ubuntu import (
+    destroy_services,
     generate_systemd_service_string,
     setup_broker_service,
     setup_poller_service,
     setup_worker_service,
+    start_services,
+    stop_services,
 )
 
 
@@ -473,6 +476,40 @@ WantedBy=multi-user.target"""
     assert result == expected_output
 
 
+def test_generate_systemd_service_string_worker_options():
+    """Test generate_systemd_service_string with the abort timeout and watchdog signal set."""
+    result = generate_systemd_service_string(
+        description="Test Service",
+        service_user="ubuntu",
+        service_group="testgroup",
+        service_type="notify",
+        exec_start="/usr/bin/test",
+        service_restart="always",
+        restart_sec=60,
+        timeout_abort_sec=600,
+        watchdog_sec=259200,
+        watchdog_signal="SIGINT",
+        private_tmp=True,
+    )
+
+    expected_output = """[Unit]
+Description=Test Service
+
+[Service]
+User=ubuntu
+Group=testgroup
+Type=notify
+ExecStart=/usr/bin/test
+Restart=always
+RestartSec=60
+TimeoutAbortSec=600
+WatchdogSec=259200
+WatchdogSignal=SIGINT
+PrivateTmp=yes"""
+
+    assert result == expected_output
+
+
 @patch("git_ubuntu.create_systemd_service_file")
 def test_git_ubuntu_broker_setup_success(mock_create_file):
     """Test GitUbuntuBroker setup with default parameters."""
@@ -495,6 +532,29 @@ def test_git_ubuntu_broker_setup_custom_port(mock_create_file):
     mock_create_file.assert_called_once()
 
 
+@patch("git_ubuntu.create_systemd_service_file")
+def test_git_ubuntu_broker_setup_service_string(mock_create_file):
+    """Test GitUbuntuBroker setup fills in the service file template."""
+    mock_create_file.return_value = True
+
+    setup_broker_service("test_home", "ubuntu", "testgroup", broker_port=8080)
+
+    expected_output = generate_systemd_service_string(
+        "git-ubuntu importer service broker",
+        "ubuntu",
+        "testgroup",
+        "simple",
+        "/snap/bin/git-ubuntu importer-service-broker tcp://*:8080",
+        service_restart="always",
+        environment="PYTHONUNBUFFERED=1",
+        runtime_dir="git-ubuntu",
+        wanted_by="multi-user.target",
+    )
+    mock_create_file.assert_called_once_with(
+        "git-ubuntu-importer-service-broker.service", "test_home/services", expected_output
+    )
+
+
 @patch("git_ubuntu.create_systemd_service_file")
 def test_git_ubuntu_broker_setup_failure(mock_create_file):
     """Test GitUbuntuBroker setup when file creation fails."""
@@ -632,3 +692,80 @@ def test_git_ubuntu_worker_setup_failure(mock_create_file):
     result = setup_worker_service("test_home", "ubuntu", "testgroup")
 
     assert result is False
+
+
+@patch("git_ubuntu.stop_service_units")
+def test_stop_services_globs_worker_instances(mock_stop_service_units, tmp_path):
+    """Test stopping services matches every worker instance in one call."""
+    mock_stop_service_units.return_value = True
+    (tmp_path / "git-ubuntu-importer-service-worker@.service").touch()
+    (tmp_path / "README").touch()
+
+    result = stop_services(tmp_path.as_posix())
+
+    assert result is True
+    mock_stop_service_units.assert_called_once_with(["git-ubuntu-importer-service-worker@*"])
+
+
+@patch("service_management.systemd.service_stop")
+@patch("service_management.systemd._systemctl")
+def test_stop_services_missing_systemd_link(mock_systemctl, mock_service_stop, tmp_path):
+    """Test a service whose systemd link is missing is not stopped, so reset can continue."""
+    # systemctl is-active reports a unit that is not loaded as inactive.
+    mock_systemctl.return_value = 3
+    (tmp_path / "git-ubuntu-importer-service-broker.service").touch()
+
+    result = stop_services(tmp_path.as_posix())
+
+    assert result is True
+    mock_systemctl.assert_called_once_with(
+        "--quiet", "is-active", "git-ubuntu-importer-service-broker.service"
+    )
+    mock_service_stop.assert_not_called()
+
+
+@patch("git_ubuntu.stop_service_units")
+def test_stop_services_missing_folder(mock_stop_service_units, tmp_path):
+    """Test stopping services fails when the service folder does not exist."""
+    result = stop_services((tmp_path / "missing").as_posix())
+
+    assert result is False
+    mock_stop_service_units.assert_not_called()
+
+
+def test_destroy_services_removes_files_and_links(tmp_path):
+    """Test destroying services removes service files and their systemd links."""
+    services_dir = tmp_path / "services"
+    systemd_dir = tmp_path / "systemd"
+    services_dir.mkdir()
+    systemd_dir.mkdir()
+    (services_dir / "a.service").touch()
+    (services_dir / "b.service").touch()
+    (services_dir / "README").touch()
+    (systemd_dir / "a.service").touch()
+
+    with patch("git_ubuntu.SYSTEMD_SYSTEM_DIR", systemd_dir.as_posix()):
+        result = destroy_services(services_dir.as_posix())
+
+    assert result is True
+    assert [path.name for path in services_dir.iterdir()] == ["README"]
+    assert list(systemd_dir.iterdir()) == []
+
+
+@patch("git_ubuntu.wait_for_service_active")
+@patch("git_ubuntu.start_service_units")
+def test_start_services_shares_startup_deadline(mock_start_units, mock_wait_active, tmp_path):
+    """Test worker instances are started together and waited on with one deadline."""
+    mock_start_units.return_value = True
+    mock_wait_active.return_value = True
+    (tmp_path / "git-ubuntu-importer-service-worker@.service").touch()
+
+    result = start_services(tmp_path.as_posix(), 1, 2)
+
+    assert result is True
+    mock_start_units.assert_called_once_with(
+        ["git-ubuntu-importer-service-worker@w1-0", "git-ubuntu-importer-service-worker@w1-1"]
+    )
+    timeouts = [call.args[1] for call in mock_wait_active.call_args_list]
+    assert len(timeouts) == 2
+    assert 0 <= timeouts[1] <= timeouts[0] <= 30
@@ -10,10 +10,12 @@ from unittest.mock import patch
 import importer_node
 
 
+@patch("importer_node.daemon_reload")
 @patch("importer_node.git_ubuntu.setup_worker_service")
-def test_setup_secondary_node_success(mock_setup_worker):
+def test_setup_secondary_node_success(mock_setup_worker, mock_daemon_reload):
     """Test successful secondary node setup."""
     mock_setup_worker.return_value = True
+    mock_daemon_reload.return_value = True
 
     result = importer_node.setup_secondary_node(
         "/var/local/git-ubuntu", "git-ubuntu", True, 1692, "192.168.1.1"
@@ -21,6 +23,7 @@ def test_setup_secondary_node_success(mock_setup_worker):
 
     assert result is True
     assert mock_setup_worker.call_count == 1
+    mock_daemon_reload.assert_called_once()
 
 
 @patch("importer_node.git_ubuntu.setup_worker_service")
@@ -35,18 +38,35 @@ def test_setup_secondary_node_failure(mock_setup_worker):
     assert result is False
 
 
+@patch("importer_node.daemon_reload")
 @patch("importer_node.git_ubuntu.setup_poller_service")
 @patch("importer_node.git_ubuntu.setup_broker_service")
-def test_setup_primary_node_success(mock_broker, mock_poller):
-    """Test successful primary node setup."""
+def test_setup_primary_node_success(mock_broker, mock_poller, mock_daemon_reload, tmp_path):
+    """Test successful primary node setup reloads systemd once."""
     mock_broker.return_value = True
     mock_poller.return_value = True
+    mock_daemon_reload.return_value = True
 
-    result = importer_node.setup_primary_node("/var/local/git-ubuntu", "git-ubuntu", 1692)
+    result = importer_node.setup_primary_node(tmp_path.as_posix(), "git-ubuntu", 1692)
 
     assert result is True
     mock_broker.assert_called_once()
     mock_poller.assert_called_once()
+    mock_daemon_reload.assert_called_once()
+
+
+def test_denylist_exists(tmp_path):
+    """Test the package denylist is found in the git-ubuntu source checkout."""
+    denylist = tmp_path / importer_node.PACKAGE_DENYLIST_PATH
+    denylist.parent.mkdir(parents=True)
+    denylist.touch()
+
+    assert importer_node.denylist_exists(tmp_path.as_posix()) is True
+
+
+def test_denylist_exists_missing(tmp_path):
+    """Test a missing package denylist is reported."""
+    assert importer_node.denylist_exists(tmp_path.as_posix()) is False
 
 
 @patch("importer_node.setup_secondary_node")
@@ -140,3 +160,58 @@ def test_reset_destroy_failure(mock_stop, mock_destroy):
     result = importer_node.reset("/var/local/git-ubuntu")
 
     assert result is False
+
+
+def test_config_digest_round_trip(tmp_path):
+    """Test a saved config digest is recognised until the node is reset."""
+    home = tmp_path.as_posix()
+    systemd_dir = tmp_path / "systemd"
+    systemd_dir.mkdir()
+    (tmp_path / "services").mkdir()
+    (tmp_path / "services" / "git-ubuntu-importer-service-worker@.service").write_text("[Unit]")
+    (systemd_dir / "git-ubuntu-importer-service-worker@.service").write_text("[Unit]")
+    digest = importer_node.get_config_digest(False, 1, 2, "git-ubuntu-bot", True, 1692)
+
+    with patch("importer_node.SYSTEMD_SYSTEM_DIR", systemd_dir.as_posix()):
+        assert not importer_node.is_config_current(home, False, digest)
+
+        with patch("importer_node.pathops.LocalPath.write_text") as mock_write_text:
+            importer_node.save_config_digest(home, digest)
+        mock_write_text.assert_called_once_with(
+            digest, encoding="utf-8", user="root", group="root"
+        )
+
+        (tmp_path / importer_node.NODE_CONFIG_DIGEST_FILENAME).write_text(digest)
+        assert importer_node.is_config_current(home, False, digest)
+        assert not importer_node.is_config_current(
+            home, False, importer_node.get_config_digest(False, 1, 3, "git-ubuntu-bot", True, 1692)
+        )
+
+        with (
+            patch("importer_node.git_ubuntu.stop_services", return_value=True),
+            patch("importer_node.git_ubuntu.destroy_services", return_value=True),
+        ):
+            assert importer_node.reset(home)
+        assert not importer_node.is_config_current(home, False, digest)
+
+
+def test_config_digest_covers_service_templates():
+    """Test the config digest changes when an upgrade changes the service templates."""
+    digest = importer_node.get_config_digest(True, 0, 2, "git-ubuntu-bot", True, 1692)
+
+    with patch("importer_node.git_ubuntu.SERVICE_TEMPLATES", ("[Unit]",)):
+        assert digest != importer_node.get_config_digest(True, 0, 2, "git-ubuntu-bot", True, 1692)
+
+
+def test_config_not_current_with_missing_service_file(tmp_path):
+    """Test services are set up again when a service file was removed outside the charm."""
+    digest = importer_node.get_config_digest(True, 0, 2, "git-ubuntu-bot", True, 1692)
+    (tmp_path / importer_node.NODE_CONFIG_DIGEST_FILENAME).write_text(digest)
+    systemd_dir = tmp_path / "systemd"
+    systemd_dir.mkdir()
+    (tmp_path / "services").mkdir()
+    (tmp_path / "services" / "git-ubuntu-importer-service-broker.service").write_text("[Unit]")
+    (systemd_dir / "git-ubuntu-importer-service-broker.service").write_text("[Unit]")
+
+    with patch("importer_node.SYSTEMD_SYSTEM_DIR", systemd_dir.as_posix()):
+        assert not importer_node.is_config_current(tmp_path.as_posix(), True, digest)
@@ -20,3 +20,4 @@ def test_check_lpuser_fail():
     assert not lp.is_valid_lp_username("git?ubuntu?bot")
     assert not lp.is_valid_lp_username("")
     assert not lp.is_valid_lp_username("test()")
+    assert not lp.is_valid_lp_username("git-ubuntu-bot\n")
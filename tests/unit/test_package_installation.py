@@ -5,56 +5,54 @@
 
 """Unit tests for package management and configuration."""
 
+import subprocess
 from unittest.mock import patch
 
-from charmlibs import apt
 from charms.operator_libs_linux.v2 import snap
+from pytest import fixture
 
 import package_installation as pkgs
 
 
-@patch("package_installation.apt.update")
-@patch("package_installation.apt.add_package")
-def test_git_install_success(mock_add_package, mock_update):
-    """Test successful git install."""
-    assert pkgs.git_install()
-
-    mock_update.assert_called_once()
-    mock_add_package.assert_called_once_with("git")
+@fixture(autouse=True)
+def clear_snap_cache():
+    """Drop any snap cache left over from a previous test."""
+    pkgs._snap_cache.cache_clear()
 
 
 @patch("package_installation.apt.update")
-@patch("package_installation.apt.add_package")
-def test_git_install_fail(mock_add_package, mock_update):
-    """Test failed git install."""
-    mock_add_package.side_effect = apt.PackageError
-
-    assert not pkgs.git_install()
+@patch("package_installation.subprocess.run")
+def test_install_packages_success(mock_run, mock_update):
+    """Test successful install of several packages in one apt-get call."""
+    assert pkgs.install_packages(["git", "sqlite3"])
 
     mock_update.assert_called_once()
-    mock_add_package.assert_called_once_with("git")
+    mock_run.assert_called_once()
+    assert mock_run.call_args.args[0][-3:] == ["install", "git", "sqlite3"]
+    assert mock_run.call_args.kwargs["env"]["DEBIAN_FRONTEND"] == "noninteractive"
 
 
 @patch("package_installation.apt.update")
-@patch("package_installation.apt.add_package")
-def test_sqlite3_install_success(mock_add_package, mock_update):
-    """Test successful git install."""
-    assert pkgs.sqlite3_install()
+@patch("package_installation.subprocess.run")
+def test_install_packages_fail(mock_run, mock_update):
+    """Test failed install of several packages."""
+    mock_run.side_effect = subprocess.CalledProcessError(100, "apt-get", stderr="E: failure")
+
+    assert not pkgs.install_packages(["git", "sqlite3"])
 
     mock_update.assert_called_once()
-    mock_add_package.assert_called_once_with("sqlite3")
+    mock_run.assert_called_once()
 
 
 @patch("package_installation.apt.update")
-@patch("package_installation.apt.add_package")
-def test_sqlite3_install_fail(mock_add_package, mock_update):
-    """Test failed git install."""
-    mock_add_package.side_effect = apt.PackageError
+@patch("package_installation.subprocess.run")
+def test_install_packages_update_fail(mock_run, mock_update):
+    """Test packages are not installed when the package list update fails."""
+    mock_update.side_effect = subprocess.CalledProcessError(100, "apt-get", stderr=b"E: failure")
 
-    assert not pkgs.sqlite3_install()
+    assert not pkgs.install_packages(["git", "sqlite3"])
 
-    mock_update.assert_called_once()
-    mock_add_package.assert_called_once_with("sqlite3")
+    mock_run.assert_not_called()
 
 
 @patch("package_installation.snap.SnapCache")
@@ -73,3 +71,38 @@ def test_git_ubuntu_snap_refresh_success(mock_snap_cache):
     assert pkgs.git_ubuntu_snap_refresh("stable")
 
     mock_snap_cache.assert_called_once()
+
+
+@patch("package_installation.snap.SnapCache")
+def test_git_ubuntu_snap_refresh_reuses_cache(mock_snap_cache):
+    """Test the snap cache is only built once across refreshes."""
+    assert pkgs.git_ubuntu_snap_refresh("stable")
+    assert pkgs.git_ubuntu_snap_refresh("edge")
+
+    mock_snap_cache.assert_called_once()
+
+
+@patch("package_installation.snap.SnapCache")
+def test_git_ubuntu_snap_refresh_same_channel(mock_snap_cache):
+    """Test refresh is skipped when the snap already tracks the channel."""
+    git_ubuntu_snap = mock_snap_cache.return_value["git-ubuntu"]
+    git_ubuntu_snap.present = True
+    git_ubuntu_snap.channel = "latest/stable"
+
+    assert pkgs.git_ubuntu_snap_refresh("stable")
+
+    git_ubuntu_snap.ensure.assert_not_called()
+
+
+@patch("package_installation.snap.SnapCache")
+def test_git_ubuntu_snap_refresh_new_channel(mock_snap_cache):
+    """Test refresh runs when the snap tracks a different channel."""
+    git_ubuntu_snap = mock_snap_cache.return_value["git-ubuntu"]
+    git_ubuntu_snap.present = True
+    git_ubuntu_snap.channel = "latest/beta"
+
+    assert pkgs.git_ubuntu_snap_refresh("stable")
+
+    git_ubuntu_snap.ensure.assert_called_once_with(
+        snap.SnapState.Latest, classic=True, channel="stable"
+    )
@@ -0,0 +1,99 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+#
+# Learn more about testing at: https://juju.is/docs/sdk/testing
+
+"""Unit tests for systemd service management."""
+
+from unittest.mock import patch
+
+import service_management
+
+
+def test_create_systemd_service_file_changed(tmp_path):
+    """Test a service file with new content replaces both the file and its link."""
+    services_dir = tmp_path / "services"
+    systemd_dir = tmp_path / "systemd"
+    services_dir.mkdir()
+    systemd_dir.mkdir()
+    (services_dir / "test.service").write_text("[Unit]")
+    (systemd_dir / "test.service").write_text("[Unit]")
+
+    def write_temp_file(data, user, group):
+        """Write the temporary service file in place of the mocked pathops write.
+
+        Args:
+            data: The service file content.
+            user: The file owner.
+            group: The file group.
+        """
+        (services_dir / ".test.service.tmp").write_bytes(data)
+
+    with (
+        patch("service_management.SYSTEMD_SYSTEM_DIR", systemd_dir.as_posix()),
+        patch("service_management.pathops.LocalPath.write_bytes") as mock_write_bytes,
+    ):
+        mock_write_bytes.side_effect = write_temp_file
+        result = service_management.create_systemd_service_file(
+            "test.service", services_dir.as_posix(), "[Service]"
+        )
+
+    assert result is True
+    mock_write_bytes.assert_called_once_with(b"[Service]", user="root", group="root")
+    assert (systemd_dir / "test.service").read_text() == "[Service]"
+    assert (systemd_dir / "test.service").samefile(services_dir / "test.service")
+    assert sorted(path.name for path in services_dir.iterdir()) == ["test.service"]
+
+
+@patch("service_management.systemd.service_start")
+def test_start_service_units(mock_service_start):
+    """Test all services are started with a single systemctl call."""
+    mock_service_start.return_value = True
+
+    result = service_management.start_service_units(["a.service", "b@w1-0"])
+
+    assert result is True
+    mock_service_start.assert_called_once_with("a.service", "b@w1-0")
+
+
+@patch("service_management.systemd.service_stop")
+@patch("service_management.systemd.service_running")
+def test_stop_service_units_skips_units_not_running(mock_service_running, mock_service_stop):
+    """Test only running units and globs are passed to the single systemctl stop call."""
+    mock_service_running.side_effect = lambda service: service == "a.service"
+    mock_service_stop.return_value = True
+
+    result = service_management.stop_service_units(["a.service", "b.service", "c@*"])
+
+    assert result is True
+    mock_service_stop.assert_called_once_with("a.service", "c@*")
+
+
+@patch("service_management.systemd.service_stop")
+@patch("service_management.systemd.service_running")
+def test_stop_service_units_failure(mock_service_running, mock_service_stop):
+    """Test a failed systemctl stop call is reported."""
+    mock_service_running.return_value = True
+    mock_service_stop.side_effect = service_management.systemd.SystemdError("failed")
+
+    assert service_management.stop_service_units(["a.service"]) is False
+
+
+@patch("service_management.time.sleep")
+@patch("service_management.systemd.service_running")
+def test_wait_for_service_active_checks_once_without_time(mock_service_running, mock_sleep):
+    """Test a service that is already active is reported even with no time left."""
+    mock_service_running.return_value = True
+
+    assert service_management.wait_for_service_active("a.service", 0) is True
+    mock_sleep.assert_not_called()
+
+
+@patch("service_management.time.sleep")
+@patch("service_management.systemd.service_running")
+def test_wait_for_service_active_timeout(mock_service_running, mock_sleep):
+    """Test waiting fails once the timeout has run out."""
+    mock_service_running.return_value = False
+
+    assert service_management.wait_for_service_active("a.service", 0) is False
+    mock_service_running.assert_called_once_with("a.service")
@@ -11,66 +11,115 @@ import user_management
 
 
 @patch("user_management._run_command_as_user")
-def test_git_update_user_name_config_success(mock_run_command_as_user):
-    """Test successful git user name config update."""
-    mock_run_command_as_user.return_value = True
-
-    assert user_management.update_git_user_name("ubuntu", "Test User", "/home/ubuntu")
-    mock_run_command_as_user.assert_called_once_with(
-        "ubuntu", "git config --global user.name 'Test User'", {"HOME": "/home/ubuntu"}
+def test_update_git_config_success(mock_run_command):
+    """Test each git config entry is set with its own git config call."""
+    mock_run_command.return_value = True
+
+    assert user_management.update_git_config(
+        "ubuntu",
+        "/home/ubuntu",
+        {
+            "user.name": "Test User",
+            "user.email": "test@example.com",
+            "gitubuntu.lpuser": "test-lp-user",
+        },
     )
 
+    assert [call.args for call in mock_run_command.call_args_list] == [
+        (
+            "ubuntu",
+            ["git", "config", "--global", "user.name", "Test User"],
+            {"HOME": "/home/ubuntu"},
+        ),
+        (
+            "ubuntu",
+            ["git", "config", "--global", "user.email", "test@example.com"],
+            {"HOME": "/home/ubuntu"},
+        ),
+        (
+            "ubuntu",
+            ["git", "config", "--global", "gitubuntu.lpuser", "test-lp-user"],
+            {"HOME": "/home/ubuntu"},
+        ),
+    ]
+
 
 @patch("user_management._run_command_as_user")
-def test_git_update_user_name_config_fail(mock_run_command_as_user):
-    """Test failed git user name config update."""
-    mock_run_command_as_user.return_value = False
+def test_update_git_config_fail(mock_run_command):
+    """Test failed git config update stops at the first failing entry."""
+    mock_run_command.return_value = False
 
-    assert not user_management.update_git_user_name("ubuntu", "Test User", "/home/ubuntu")
-    mock_run_command_as_user.assert_called_once_with(
-        "ubuntu", "git config --global user.name 'Test User'", {"HOME": "/home/ubuntu"}
+    assert not user_management.update_git_config(
+        "ubuntu", "/home/ubuntu", {"user.name": "Test User", "user.email": "test@example.com"}
     )
+    mock_run_command.assert_called_once()
 
 
-@patch("user_management._run_command_as_user")
-def test_git_update_user_email_config_success(mock_run_command_as_user):
-    """Test successful git user email config update."""
-    mock_run_command_as_user.return_value = True
+@patch("user_management.pathops.LocalPath.group", return_value="root")
+@patch("user_management.pathops.LocalPath.owner", return_value="root")
+def test_update_ssh_private_key_unchanged(_mock_owner, _mock_group, tmp_path):
+    """Test an identical ssh private key with the right mode and owner is not rewritten."""
+    ssh_key_file = tmp_path / ".ssh" / "id"
+    ssh_key_file.parent.mkdir()
+    ssh_key_file.write_text("ssh-data")
+    ssh_key_file.chmod(0o600)
 
-    assert user_management.update_git_email("ubuntu", "test@example.com", "/home/ubuntu")
-    mock_run_command_as_user.assert_called_once_with(
-        "ubuntu", "git config --global user.email test@example.com", {"HOME": "/home/ubuntu"}
-    )
+    with patch("user_management.pathops.LocalPath.write_text") as mock_write_text:
+        assert user_management.update_ssh_private_key("root", tmp_path.as_posix(), "ssh-data")
 
+    mock_write_text.assert_not_called()
 
-@patch("user_management._run_command_as_user")
-def test_git_update_user_email_config_fail(mock_run_command_as_user):
-    """Test failed git user email config update."""
-    mock_run_command_as_user.return_value = False
 
-    assert not user_management.update_git_email("ubuntu", "test@example.com", "/home/ubuntu")
-    mock_run_command_as_user.assert_called_once_with(
-        "ubuntu", "git config --global user.email test@example.com", {"HOME": "/home/ubuntu"}
-    )
+@patch("user_management.pathops.LocalPath.group", return_value="root")
+@patch("user_management.pathops.LocalPath.owner", return_value="root")
+def test_update_ssh_private_key_wrong_mode(_mock_owner, _mock_group, tmp_path):
+    """Test an identical ssh private key is rewritten to restore its permissions."""
+    ssh_key_file = tmp_path / ".ssh" / "id"
+    ssh_key_file.parent.mkdir()
+    ssh_key_file.write_text("ssh-data")
+    ssh_key_file.chmod(0o644)
 
+    with patch("user_management.pathops.LocalPath.write_text") as mock_write_text:
+        assert user_management.update_ssh_private_key("root", tmp_path.as_posix(), "ssh-data")
 
-@patch("user_management._run_command_as_user")
-def test_lp_user_config_success(mock_run_command_as_user):
-    """Test successful launchpad user config update."""
-    mock_run_command_as_user.return_value = True
+    mock_write_text.assert_called_once_with("ssh-data", mode=0o600, user="root", group="root")
 
-    assert user_management.update_git_ubuntu_lpuser("ubuntu", "test-lp-user", "/home/ubuntu")
-    mock_run_command_as_user.assert_called_once_with(
-        "ubuntu", "git config --global gitubuntu.lpuser test-lp-user", {"HOME": "/home/ubuntu"}
-    )
+
+def test_update_launchpad_credentials_secret_changed(tmp_path):
+    """Test new Launchpad credentials replace the existing file."""
+    lp_key_file = tmp_path / ".config" / "lp-credentials.oauth"
+    lp_key_file.parent.mkdir()
+    lp_key_file.write_text("old-data")
+
+    with patch("user_management.pathops.LocalPath.write_text") as mock_write_text:
+        assert user_management.update_launchpad_credentials_secret(
+            "root", tmp_path.as_posix(), "new-data"
+        )
+
+    mock_write_text.assert_called_once_with("new-data", mode=0o600, user="root", group="root")
 
 
 @patch("user_management._run_command_as_user")
-def test_lp_user_config_fail(mock_run_command_as_user):
-    """Test failed launchpad user config update."""
-    mock_run_command_as_user.return_value = False
+def test_refresh_git_ubuntu_source_clone(mock_run_command, tmp_path):
+    """Test a new git-ubuntu source checkout is cloned without historical blobs."""
+    mock_run_command.return_value = True
+    clone_dir = (tmp_path / "live-allowlist-denylist-source").as_posix()
+
+    result = user_management.refresh_git_ubuntu_source(
+        "git-ubuntu", tmp_path.as_posix(), "https://example.com/git-ubuntu", "http://proxy:3128"
+    )
 
-    assert not user_management.update_git_ubuntu_lpuser("ubuntu", "test-lp-user", "/home/ubuntu")
-    mock_run_command_as_user.assert_called_once_with(
-        "ubuntu", "git config --global gitubuntu.lpuser test-lp-user", {"HOME": "/home/ubuntu"}
+    assert result is True
+    mock_run_command.assert_called_once_with(
+        "git-ubuntu",
+        [
+            "git",
+            "-c",
+            "protocol.version=2",
+            "clone",
+            "--filter=blob:none",
+            "https://example.com/git-ubuntu",
+            clone_dir,
+        ],
+        {"HOME": tmp_path.as_posix(), "HTTPS_PROXY": "http://proxy:3128"},
     )